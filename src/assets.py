@@ -0,0 +1,231 @@
+"""
+Incremental copying of static assets into the output directory.
+
+An asset is only copied when its size or mtime differs from the copy already
+in the output. Copies keep the source's mtime, so the next build can tell
+they are current from a stat alone.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+from pathlib import Path
+import shutil
+import time
+from typing import BinaryIO, Dict, Iterable, List, Tuple
+
+from instrument import Tracer, span
+from manifest import file_digest
+
+logger = logging.getLogger(__name__)
+
+# Copies are I/O-bound, so more threads than cores still pay off.
+COPY_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+# Small files are handed to the pool in batches of up to this many files or
+# bytes, so per-task overhead does not dominate; large files go one per task.
+COPY_BATCH_FILES = 64
+COPY_BATCH_BYTES = 8 * 1024 * 1024
+
+
+class SyncStats:
+    __slots__ = ("copied", "skipped", "removed", "files")
+
+    def __init__(self) -> None:
+        self.copied = 0
+        self.skipped = 0
+        self.removed = 0
+        # Relative POSIX paths of every asset now in the output.
+        self.files: List[str] = []
+
+    def __repr__(self) -> str:
+        return (
+            f"SyncStats(copied={self.copied}, skipped={self.skipped}, "
+            f"removed={self.removed})"
+        )
+
+
+def scan_files(root: Path) -> Dict[str, os.stat_result]:
+    """Map the relative POSIX path of every file below root to its stat."""
+    files: Dict[str, os.stat_result] = {}
+    pending = [("", str(root))]
+    while pending:
+        prefix, directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    pending.append((prefix + entry.name + "/", entry.path))
+                elif entry.is_file():
+                    files[prefix + entry.name] = entry.stat()
+    return files
+
+
+def remove_output(path: Path, root: Path) -> None:
+    """Delete a generated file and any directories it leaves empty below root."""
+    path.unlink(missing_ok=True)
+    parent = path.parent
+    while parent != root and root in parent.parents:
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+        parent = parent.parent
+
+
+def copy_data(fsrc: BinaryIO, fdst: BinaryIO, size: int) -> None:
+    # copy_file_range copies inside the kernel, and filesystems such as btrfs
+    # and XFS turn it into a reflink that shares the data blocks.
+    if hasattr(os, "copy_file_range"):
+        try:
+            copied = 0
+            while copied < size:
+                n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied)
+                if n == 0:
+                    break
+                copied += n
+            return
+        except OSError:
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+    shutil.copyfileobj(fsrc, fdst)
+
+
+def copy_file(src: Path, dest: Path, st: os.stat_result, link: bool = False) -> None:
+    """
+    Copy src over dest, keeping its mode and mtime, or hardlink it if link is set.
+
+    The copy is written to a sibling and renamed into place, so dest is never
+    half-written and a hardlinked dest is replaced rather than written through.
+    Hardlinking falls back to copying across filesystems.
+    """
+    tmp = dest.with_name(f".{dest.name}.tmp")
+    try:
+        if link:
+            try:
+                os.link(src, tmp)
+                os.replace(tmp, dest)
+                return
+            except OSError:
+                tmp.unlink(missing_ok=True)
+        with src.open("rb") as fsrc, tmp.open("wb") as fdst:
+            copy_data(fsrc, fdst, st.st_size)
+        shutil.copymode(src, tmp)
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def is_current(src: Path, dest: Path, st: os.stat_result, verify_hash: bool) -> bool:
+    """
+    Tell whether dest already holds src.
+
+    Same size and mtime means current. With verify_hash, a same-sized dest
+    whose mtime differs is compared by content, and its mtime is brought in
+    line when the contents match.
+    """
+    try:
+        dest_st = dest.stat()
+    except OSError:
+        return False
+    if dest_st.st_size != st.st_size:
+        return False
+    if dest_st.st_mtime_ns == st.st_mtime_ns:
+        return True
+    if verify_hash and file_digest(src) == file_digest(dest):
+        os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+        return True
+    return False
+
+
+def batch_files(
+    files: Dict[str, os.stat_result],
+) -> List[List[Tuple[str, os.stat_result]]]:
+    """Group files into copy batches bounded by COPY_BATCH_FILES and COPY_BATCH_BYTES."""
+    batches: List[List[Tuple[str, os.stat_result]]] = []
+    batch: List[Tuple[str, os.stat_result]] = []
+    batch_bytes = 0
+    for rel, st in sorted(files.items()):
+        if st.st_size >= COPY_BATCH_BYTES:
+            batches.append([(rel, st)])
+            continue
+        if len(batch) == COPY_BATCH_FILES or batch_bytes + st.st_size > COPY_BATCH_BYTES:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append((rel, st))
+        batch_bytes += st.st_size
+    if batch:
+        batches.append(batch)
+    # Start the largest batches first so one big file does not finish last.
+    batches.sort(key=lambda b: sum(st.st_size for _, st in b), reverse=True)
+    return batches
+
+
+def sync_batch(
+    src: Path,
+    dest: Path,
+    batch: List[Tuple[str, os.stat_result]],
+    verify_hash: bool,
+    link: bool,
+    tracer: Tracer | None = None,
+) -> int:
+    """Sync one batch of files and return how many were copied."""
+    copied = 0
+    for rel, st in batch:
+        source = src / rel
+        target = dest / rel
+        if is_current(source, target, st, verify_hash):
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with span(tracer, "copy", "asset", file=rel):
+            copy_file(source, target, st, link)
+        copied += 1
+    return copied
+
+
+def sync_tree(
+    src: Path,
+    dest: Path,
+    previous: Iterable[str] = (),
+    verify_hash: bool = False,
+    link: bool = False,
+    workers: int = COPY_WORKERS,
+    tracer: Tracer | None = None,
+    remove_stale: bool = True,
+) -> SyncStats:
+    """
+    Make dest hold a copy of every file in src, copying only what changed.
+
+    previous lists the assets synced last time (relative POSIX paths); those
+    no longer in src are deleted from dest. Other files in dest, such as the
+    generated pages, are left alone. Files are checked and copied on a pool
+    of workers threads. With tracer, every copy is recorded as a span.
+    Without remove_stale, deleting the missing assets is left to the caller.
+    """
+    start = time.perf_counter()
+    stats = SyncStats()
+    files = scan_files(src) if src.is_dir() else {}
+    batches = batch_files(files)
+    if workers <= 1 or len(batches) <= 1:
+        stats.copied = sum(
+            sync_batch(src, dest, b, verify_hash, link, tracer) for b in batches
+        )
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+            stats.copied = sum(
+                pool.map(lambda b: sync_batch(src, dest, b, verify_hash, link, tracer), batches)
+            )
+    stats.skipped = len(files) - stats.copied
+    stats.files = sorted(files)
+
+    if remove_stale:
+        for rel in previous:
+            if rel not in files:
+                remove_output(dest / rel, dest)
+                stats.removed += 1
+
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(
+        f"Synced {src}: copied {stats.copied}, skipped {stats.skipped}, "
+        f"removed {stats.removed} in {elapsed:.0f} ms"
+    )
+    return stats
@@ -0,0 +1,173 @@
+"""
+Fail when a pipeline stage is slower than the committed baseline.
+
+Runs the stages of bench_pipeline on the corpus the baseline was recorded
+with. Raw times depend on the machine and, on a shared runner, on whatever
+else it is running at the moment, so a fixed calibration workload is timed
+right before every round of every stage. Each round gives the ratio of the
+stage's time to the calibration's, and a stage is judged by the median of
+its ratios: a neighbour slowing the machine down for a while slows both
+halves of the rounds it hits, and outlying rounds do not move the median.
+The baseline's ratio times this run's calibration is the expected time.
+
+A stage regresses when it is both more than --tolerance slower than that
+and more than --floor seconds slower; a suspected regression is measured
+again, and judged on the rounds of both runs, before it counts. Each
+stage's noise is the interquartile range of its ratios as a fraction of
+their median, measured in this run; a stage noisier than --tolerance cannot
+be judged at that tolerance, so it is reported as noisy instead of failing.
+
+Run with: python3 src/bench_gate.py (or ./test.sh --bench)
+Record a new baseline with: python3 src/bench_gate.py --update
+"""
+import argparse
+import json
+from pathlib import Path
+import statistics
+import sys
+from typing import Dict, List, Tuple
+
+from bench_pipeline import RESULTS_VERSION, run_benchmarks, timed
+
+BASELINE_PATH = Path(__file__).with_name("bench_baseline.json")
+GATE_SCALE = 0.25
+GATE_REPEAT = 15
+BASELINE_ROUNDS = 3
+TOLERANCE = 0.25
+FLOOR = 0.002
+
+# stage, expected seconds, measured seconds, noise, status
+Row = Tuple[str, float, float, float, str]
+
+
+def calibration_workload() -> None:
+    # Plain interpreter work that does not touch the pipeline, so its speed
+    # tracks the machine and the Python build but not our code.
+    words = [f"{i * 7919 % 100003:06d}" for i in range(100_000)]
+    counts: Dict[str, int] = {}
+    for word in sorted(words):
+        counts[word[:3]] = counts.get(word[:3], 0) + len(word.replace("0", ""))
+    "".join(words).split("9")
+
+
+def add_ratios(results: Dict) -> None:
+    """Summarize each stage's rounds as the median and spread of stage/calibration ratios."""
+    references: List[float] = []
+    for timing in results["stages"].values():
+        ratios = [run / ref for run, ref in zip(timing["runs"], timing["reference"])]
+        timing["ratio"] = statistics.median(ratios)
+        if len(ratios) > 1:
+            q1, _, q3 = statistics.quantiles(ratios, n=4)
+            timing["noise"] = (q3 - q1) / timing["ratio"]
+        else:
+            timing["noise"] = 0.0
+        references.extend(timing["reference"])
+    results["calibration"] = statistics.median(references)
+
+
+def measure(scale: float, seed: int, repeat: int, stages: List[str] | None = None) -> Dict:
+    results = run_benchmarks(scale, seed, repeat, stages, reference=calibration_workload)
+    add_ratios(results)
+    return results
+
+
+def merge_rounds(current: Dict, retry: Dict) -> None:
+    """Add the rounds of retry to the stages of current it measured again."""
+    for stage, timing in retry["stages"].items():
+        current["stages"][stage]["runs"] += timing["runs"]
+        current["stages"][stage]["reference"] += timing["reference"]
+    add_ratios(current)
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float, floor: float) -> List[Row]:
+    rows: List[Row] = []
+    for stage, timing in baseline["stages"].items():
+        if stage not in current["stages"]:
+            continue
+        measured = current["stages"][stage]
+        expected = timing["ratio"] * current["calibration"]
+        actual = measured["ratio"] * current["calibration"]
+        if actual <= expected * (1 + tolerance) or actual - expected <= floor:
+            status = "ok"
+        elif measured["noise"] > tolerance:
+            status = "noisy"
+        else:
+            status = "REGRESSED"
+        rows.append((stage, expected, actual, measured["noise"], status))
+    return rows
+
+
+def format_table(rows: List[Row]) -> str:
+    lines = [
+        f"{'stage':<24}{'baseline ms':>12}{'current ms':>12}{'change':>9}{'noise':>8}  status"
+    ]
+    for stage, expected, actual, noise, status in rows:
+        change = (actual / expected - 1) * 100 if expected else 0
+        lines.append(
+            f"{stage:<24}{expected * 1000:>12.1f}{actual * 1000:>12.1f}{change:>+8.0f}%"
+            f"{noise * 100:>7.0f}%  {status}"
+        )
+    return "\n".join(lines)
+
+
+def check_corpus(baseline: Dict, current: Dict) -> None:
+    if baseline.get("version") != RESULTS_VERSION or baseline["corpus"] != current["corpus"]:
+        raise ValueError(
+            "The baseline was recorded on a different corpus; "
+            "record a new one with --update"
+        )
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument(
+        "--update", action="store_true", help="record the current timings as the baseline"
+    )
+    parser.add_argument("--scale", type=float, default=GATE_SCALE, help="with --update")
+    parser.add_argument("--repeat", type=int, default=GATE_REPEAT, help="rounds per stage")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=TOLERANCE,
+        help="fraction a stage may be slower than the baseline",
+    )
+    parser.add_argument(
+        "--floor",
+        type=float,
+        default=FLOOR,
+        metavar="SECONDS",
+        help="ignore slowdowns smaller than this, whatever the fraction",
+    )
+    args = parser.parse_args(argv)
+
+    if args.update:
+        # Every later run is compared with the baseline, so give it more rounds.
+        results = measure(args.scale, 0, args.repeat * BASELINE_ROUNDS)
+        args.baseline.write_text(json.dumps(results, indent=1) + "\n")
+        print(f"Recorded baseline in {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    current = measure(baseline["scale"], baseline["seed"], args.repeat)
+    check_corpus(baseline, current)
+    rows = compare(baseline, current, args.tolerance, args.floor)
+
+    suspects = [stage for stage, _, _, _, status in rows if status != "ok"]
+    if suspects:
+        retry = measure(baseline["scale"], baseline["seed"], args.repeat, suspects)
+        merge_rounds(current, retry)
+        rows = compare(baseline, current, args.tolerance, args.floor)
+
+    speed = baseline["calibration"] / current["calibration"]
+    print(f"Machine speed relative to the baseline: {speed:.2f}x")
+    print(format_table(rows))
+    regressed = [stage for stage, _, _, _, status in rows if status == "REGRESSED"]
+    if regressed:
+        print(f"Regressed beyond {args.tolerance:.0%}: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
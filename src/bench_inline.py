@@ -0,0 +1,115 @@
+"""
+Inline parsing speed on link-heavy paragraphs.
+
+Times split_nodes_link and split_nodes_image against the split()-based
+versions they replaced, and text_to_textnodes on the same paragraphs, for
+paragraphs with an increasing number of links. Run with:
+python3 src/bench_inline.py
+"""
+import argparse
+import time
+from typing import Callable, List
+
+from inline import (
+    extract_markdown_images,
+    extract_markdown_links,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from textnode import TextNode, TextType
+
+
+def split_nodes_link_by_split(old_nodes: List[TextNode]) -> List[TextNode]:
+    # The original implementation: re-split the remaining text once per link.
+    new_nodes: List[TextNode] = []
+    for old_node in old_nodes:
+        txt = old_node.text
+        links = extract_markdown_links(txt)
+        if not links:
+            new_nodes.append(old_node)
+            continue
+        for link in links:
+            parts = txt.split(f"[{link[0]}]({link[1]})")
+            if parts[0] != "":
+                new_nodes.append(TextNode(parts[0], old_node.node_type))
+            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
+            txt = parts[1]
+        if txt != "":
+            new_nodes.append(TextNode(txt, old_node.node_type))
+    return new_nodes
+
+
+def split_nodes_image_by_split(old_nodes: List[TextNode]) -> List[TextNode]:
+    new_nodes: List[TextNode] = []
+    for old_node in old_nodes:
+        txt = old_node.text
+        images = extract_markdown_images(txt)
+        if not images:
+            new_nodes.append(old_node)
+            continue
+        for image in images:
+            parts = txt.split(f"![{image[0]}]({image[1]})")
+            if parts[0] != "":
+                new_nodes.append(TextNode(parts[0], old_node.node_type))
+            new_nodes.append(TextNode(image[0], TextType.IMAGE, image[1]))
+            txt = parts[1]
+        if txt != "":
+            new_nodes.append(TextNode(txt, old_node.node_type))
+    return new_nodes
+
+
+def link_paragraph(links: int) -> str:
+    return " ".join(
+        f"see [release {i}](https://example.com/changelog/{i}.html) for details"
+        for i in range(links)
+    )
+
+
+def image_paragraph(images: int) -> str:
+    return " ".join(f"![shot {i}](/images/shot{i}.png) caption" for i in range(images))
+
+
+def measure(func: Callable, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: List[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    header = f"{'case':<24}{'split()':>12}{'finditer':>12}{'speedup':>10}"
+    print(f"{header}{'tokenizer':>12}")
+    for size in args.sizes:
+        cases = [
+            (
+                f"{size} links",
+                link_paragraph(size),
+                split_nodes_link_by_split,
+                split_nodes_link,
+            ),
+            (
+                f"{size} images",
+                image_paragraph(size),
+                split_nodes_image_by_split,
+                split_nodes_image,
+            ),
+        ]
+        for name, text, before, after in cases:
+            nodes = [TextNode(text, TextType.PLAIN)]
+            old = measure(before, nodes, args.repeat)
+            new = measure(after, nodes, args.repeat)
+            full = measure(text_to_textnodes, text, args.repeat)
+            row = f"{name:<24}{old:>12.5f}{new:>12.5f}{old / new:>9.1f}x"
+            print(f"{row}{full:>12.5f}")
+
+
+if __name__ == "__main__":
+    main()
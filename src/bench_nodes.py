@@ -0,0 +1,80 @@
+"""
+Memory cost per node of TextNode, LeafNode and ParentNode.
+
+Compares the slotted node classes with equivalent plain classes that carry a
+per-instance __dict__, as the node classes did before. Run with:
+python3 src/bench_nodes.py
+"""
+import argparse
+import gc
+import tracemalloc
+from typing import Callable, List
+
+from leafnode import LeafNode
+from parentnode import ParentNode
+from textnode import TextNode, TextType
+
+
+class DictTextNode:
+    def __init__(self, txt, node_type, url=None):
+        self.text = txt
+        self.node_type = node_type
+        self.url = url
+
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def bytes_per_node(factory: Callable[[int], object], count: int) -> float:
+    # The node payloads (strings, child lists) are created up front so only
+    # the node objects themselves are measured.
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    list_overhead = nodes.__sizeof__()
+    del nodes
+    return (after - before - list_overhead) / count
+
+
+def main(argv: List[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    text = "cell"
+    children: List = [LeafNode(None, text)]
+    cases = [
+        (
+            "TextNode",
+            lambda i: DictTextNode(text, TextType.PLAIN),
+            lambda i: TextNode(text, TextType.PLAIN),
+        ),
+        (
+            "LeafNode",
+            lambda i: DictHTMLNode(None, text, None, None),
+            lambda i: LeafNode(None, text),
+        ),
+        (
+            "ParentNode",
+            lambda i: DictHTMLNode("td", None, children, None),
+            lambda i: ParentNode("td", children),
+        ),
+    ]
+    print(f"{'node':<12}{'__dict__ B/node':>18}{'__slots__ B/node':>18}{'saved':>8}")
+    for name, before, after in cases:
+        dict_bytes = bytes_per_node(before, args.count)
+        slot_bytes = bytes_per_node(after, args.count)
+        saved = 1 - slot_bytes / dict_bytes
+        print(f"{name:<12}{dict_bytes:>18.1f}{slot_bytes:>18.1f}{saved:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
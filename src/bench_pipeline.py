@@ -0,0 +1,246 @@
+"""
+Time every stage of the Markdown pipeline on a synthetic corpus.
+
+Each stage (block splitting, block typing, inline parsing, table parsing,
+tree building, rendering) is timed separately on every corpus profile, and
+the whole site is built with main(). Rounds are interleaved, so drift in
+machine speed spreads evenly over the stages. Results can be written as JSON
+for comparison across commits. Run with:
+python3 src/bench_pipeline.py --repeat 5 --json results.json
+"""
+import argparse
+from contextlib import chdir, redirect_stdout
+import gc
+import io
+import json
+import logging
+from pathlib import Path
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from block import (
+    BlockType,
+    block_to_block_type,
+    classify_block,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    parse_table_block,
+)
+from corpus import generate_corpus, write_corpus
+from htmlnode import HTMLNode
+from inline import text_to_textnodes
+import main as site
+
+RESULTS_VERSION = 2
+
+# Capture group holding the inline text of each line, per block type.
+INLINE_GROUPS = {
+    BlockType.HEADING: 2,
+    BlockType.QUOTE: 1,
+    BlockType.UNORDERED_LIST: 1,
+    BlockType.ORDERED_LIST: 2,
+}
+
+
+class StageInputs:
+    """The input of every stage for one profile, prepared outside the timings."""
+
+    __slots__ = ("documents", "blocks", "texts", "tables", "nodes", "bytes")
+
+    def __init__(self, documents: List[str]) -> None:
+        self.documents = documents
+        self.blocks = [block for doc in documents for block in markdown_to_blocks(doc)]
+        self.texts: List[str] = []
+        self.tables: List[str] = []
+        for block in self.blocks:
+            classified = classify_block(block)
+            if classified.block_type == BlockType.PARAGRAPH:
+                self.texts.append(block.replace("\n", " "))
+            elif classified.block_type == BlockType.TABLE:
+                self.tables.append(block)
+            elif classified.block_type in INLINE_GROUPS:
+                group = INLINE_GROUPS[classified.block_type]
+                self.texts.extend(m.group(group) for m in classified.matches or ())
+        self.nodes: List[HTMLNode] = [markdown_to_html_node(doc) for doc in documents]
+        self.bytes = sum(len(doc.encode()) for doc in documents)
+
+
+def run_blocks(inputs: StageInputs) -> None:
+    for doc in inputs.documents:
+        markdown_to_blocks(doc)
+
+
+def run_block_types(inputs: StageInputs) -> None:
+    for block in inputs.blocks:
+        block_to_block_type(block)
+
+
+def run_inline(inputs: StageInputs) -> None:
+    for text in inputs.texts:
+        text_to_textnodes(text)
+
+
+def run_tables(inputs: StageInputs) -> None:
+    for block in inputs.tables:
+        parse_table_block(block)
+
+
+def run_tree(inputs: StageInputs) -> None:
+    for doc in inputs.documents:
+        markdown_to_html_node(doc)
+
+
+def run_to_html(inputs: StageInputs) -> None:
+    for node in inputs.nodes:
+        node.to_html()
+
+
+STAGES: Dict[str, Callable[[StageInputs], None]] = {
+    "markdown_to_blocks": run_blocks,
+    "block_to_block_type": run_block_types,
+    "text_to_textnodes": run_inline,
+    "parse_table_block": run_tables,
+    "markdown_to_html_node": run_tree,
+    "to_html": run_to_html,
+}
+BUILD_STAGE = "build"
+
+
+def timed(run: Callable[[], object]) -> float:
+    # As timeit does, keep the collector from firing in the middle of a run.
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        run()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def build_site_once(root: Path) -> None:
+    """Build the corpus site under root from scratch through main()."""
+    logging.disable(logging.INFO)
+    try:
+        with chdir(root), redirect_stdout(io.StringIO()):
+            site.main(["/", "--force"])
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def summarize(runs: List[float]) -> Dict:
+    return {"runs": runs, "min": min(runs), "median": statistics.median(runs)}
+
+
+def run_benchmarks(
+    scale: float = 1.0,
+    seed: int = 0,
+    repeat: int = 5,
+    stages: List[str] | None = None,
+    reference: Callable[[], object] | None = None,
+) -> Dict:
+    """
+    Time the selected stages (all of them, plus the build, by default).
+
+    Returns a JSON-serializable dict. Every stage has its per-round times in
+    seconds with their min and median, for the whole corpus and per profile.
+    With reference, that workload is also timed right before every round of
+    every stage, and each stage lists those times, in round order, as
+    "reference".
+    """
+    stages = stages if stages is not None else [*STAGES, BUILD_STAGE]
+    corpus = generate_corpus(scale, seed)
+    inputs = {name: StageInputs(documents) for name, documents in corpus.items()}
+    runs: Dict[str, Dict[str, List[float]]] = {stage: {} for stage in stages}
+    references: Dict[str, List[float]] = {stage: [] for stage in stages}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        if BUILD_STAGE in stages:
+            write_corpus(root, corpus)
+        for _ in range(repeat):
+            for stage in stages:
+                if reference is not None:
+                    references[stage].append(timed(reference))
+                if stage == BUILD_STAGE:
+                    seconds = timed(lambda: build_site_once(root))
+                    runs[stage].setdefault("site", []).append(seconds)
+                    continue
+                for name, profile in inputs.items():
+                    seconds = timed(lambda: STAGES[stage](profile))
+                    runs[stage].setdefault(name, []).append(seconds)
+
+    results: Dict = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "seed": seed,
+        "repeat": repeat,
+        "corpus": {
+            name: {
+                "pages": len(profile.documents),
+                "blocks": len(profile.blocks),
+                "bytes": profile.bytes,
+            }
+            for name, profile in inputs.items()
+        },
+        "stages": {},
+    }
+    for stage, by_profile in runs.items():
+        # Rounds line up across profiles, so the per-round sum is the stage's
+        # time on the whole corpus in that round.
+        totals = [sum(round_times) for round_times in zip(*by_profile.values())]
+        results["stages"][stage] = summarize(totals)
+        results["stages"][stage]["profiles"] = {
+            name: summarize(times) for name, times in by_profile.items()
+        }
+        if reference is not None:
+            results["stages"][stage]["reference"] = references[stage]
+    return results
+
+
+def print_results(results: Dict) -> None:
+    size = sum(profile["bytes"] for profile in results["corpus"].values()) / 1e6
+    print(f"{size:.1f} MB of Markdown, best and median of {results['repeat']} rounds")
+    print(f"{'stage':<24}{'min ms':>10}{'median ms':>12}{'MB/s':>10}")
+    for stage, timing in results["stages"].items():
+        best = timing["min"]
+        print(
+            f"{stage:<24}{best * 1000:>10.1f}{timing['median'] * 1000:>12.1f}"
+            f"{size / best if best else 0:>10.1f}"
+        )
+
+
+def main(argv: List[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="corpus size multiplier")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per stage")
+    parser.add_argument(
+        "--stage",
+        action="append",
+        choices=[*STAGES, BUILD_STAGE],
+        help="time only this stage (repeatable)",
+    )
+    parser.add_argument(
+        "--json", metavar="PATH", help="also write the results here ('-' for stdout)"
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scale, args.seed, args.repeat, args.stage)
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=1)
+        print()
+        return
+    print_results(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=1) + "\n")
+
+
+if __name__ == "__main__":
+    main()
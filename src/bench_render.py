@@ -0,0 +1,93 @@
+"""
+Render throughput of the HTMLNode tree on wide and deep documents.
+
+Compares the iterative walk behind to_html and write_html with the recursive
+string-building renderer it replaced. Run with: python3 src/bench_render.py
+"""
+import argparse
+import sys
+import time
+from typing import Callable, List
+
+from htmlnode import HTMLNode
+from leafnode import LeafNode
+from parentnode import ParentNode
+
+
+def recursive_to_html(node: HTMLNode) -> str:
+    # The original ParentNode.to_html: one string per subtree, re-wrapped at
+    # every nesting level.
+    if isinstance(node, LeafNode):
+        return node.to_html()
+    children_html = "".join([recursive_to_html(child) for child in node.children])
+    return f"<{node.tag}{node.props_to_html()}>{children_html}</{node.tag}>"
+
+
+def wide_tree(paragraphs: int) -> HTMLNode:
+    return ParentNode(
+        "div",
+        [
+            ParentNode(
+                "p",
+                [
+                    LeafNode(None, f"Paragraph {i} has "),
+                    LeafNode("b", "bold"),
+                    LeafNode(None, " and "),
+                    LeafNode("a", "a link", {"href": f"/posts/{i}"}),
+                    LeafNode(None, " in it."),
+                ],
+            )
+            for i in range(paragraphs)
+        ],
+    )
+
+
+def deep_tree(depth: int) -> HTMLNode:
+    node: HTMLNode = LeafNode("code", "leaf")
+    for i in range(depth):
+        node = ParentNode("blockquote", [LeafNode(None, f"level {i} "), node])
+    return node
+
+
+def measure(render: Callable[[HTMLNode], str], tree: HTMLNode, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(tree)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: List[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--depth", type=int, default=800)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    cases = [
+        (f"wide ({args.paragraphs} paragraphs)", wide_tree(args.paragraphs)),
+        (f"deep ({args.depth} levels)", deep_tree(args.depth)),
+    ]
+    print(f"{'case':<28}{'renderer':<12}{'seconds':>10}{'MB/s':>10}")
+    for name, tree in cases:
+        size = len(tree.to_html()) / 1e6
+        for label, render in (
+            ("iterative", lambda node: node.to_html()),
+            ("recursive", recursive_to_html),
+        ):
+            try:
+                seconds = measure(render, tree, args.repeat)
+            except RecursionError:
+                print(f"{name:<28}{label:<12}{'RecursionError':>20}")
+                continue
+            print(f"{name:<28}{label:<12}{seconds:>10.4f}{size / seconds:>10.1f}")
+
+    depth = sys.getrecursionlimit() * 10
+    tree = deep_tree(depth)
+    seconds = measure(lambda node: node.to_html(), tree, 1)
+    print(f"iterative renderer at depth {depth}: {seconds:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
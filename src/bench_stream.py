@@ -0,0 +1,74 @@
+"""
+Peak memory and time of whole-file versus streamed page generation.
+
+Builds one large Markdown page and renders it with generate_page twice: once
+read and parsed as a whole, once streamed block by block. Run with:
+python3 src/bench_stream.py --mb 5
+"""
+import argparse
+from pathlib import Path
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+from main import generate_page
+from template import Template
+
+SECTION = """## Section {i}
+
+Some **bold** text, some _italic_ text, `code` and a [link](/blog/{i}).
+
+- first item
+- second item with ![an image](/images/{i}.png)
+
+```
+def section_{i}():
+
+    return {i}
+```
+
+"""
+
+
+def run(source: Path, dest: Path, template: Template, stream_threshold: int):
+    # Timed without tracemalloc, which slows allocation down several times.
+    start = time.perf_counter()
+    generate_page(source, template, dest, "/", stream_threshold)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    generate_page(source, template, dest, "/", stream_threshold)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(argv: List[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mb", type=float, default=5, help="size of the page")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "page.md"
+        target = int(args.mb * 1024 * 1024)
+        with source.open("w") as f:
+            f.write("# Reference\n\n")
+            i = 0
+            while f.tell() < target:
+                f.write(SECTION.format(i=i))
+                i += 1
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+
+        size = source.stat().st_size / 1024 / 1024
+        print(f"{size:.1f} MB of Markdown")
+        print(f"{'mode':<10}{'time s':>10}{'peak MB':>10}")
+        for mode, threshold in (("whole", size * 1024 * 1024 + 1), ("streamed", 0)):
+            elapsed, peak = run(source, root / f"{mode}.html", template, int(threshold))
+            print(f"{mode:<10}{elapsed:>10.2f}{peak / 1024 / 1024:>10.1f}")
+        whole = (root / "whole.html").read_bytes()
+        assert whole == (root / "streamed.html").read_bytes()
+
+
+if __name__ == "__main__":
+    main()
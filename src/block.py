@@ -1,7 +1,10 @@
 from enum import Enum
-from re import fullmatch, search
-from typing import List
+from functools import lru_cache
+from itertools import chain
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
 
+from blockmemo import BlockMemo
 from htmlnode import HTMLNode
 from inline import text_to_textnodes
 from leafnode import LeafNode
@@ -19,11 +22,177 @@ class BlockType(Enum):
     TABLE = "TABLE"
 
 
+HEADING_RE = re.compile(r"^#{1,6}\s+(.*)$")
+HEADING_LINE_RE = re.compile(r"(#{1,6})\s+(.+)")
+CODE_RE = re.compile(r"`{3}([\s\S]*?)`{3}")
+CODE_BLOCK_RE = re.compile(r"`{3}[^\n]*\n([\s\S]*?)`{3}")
+QUOTE_LINE_RE = re.compile(r"\s{0,3}>\s?(.*)")
+UNORDERED_ITEM_RE = re.compile(r"-\s*(.+)")
+# Equivalent to `(\d+)\.\s.+`; the greedy \s* leaves the item text in group 2.
+ORDERED_ITEM_RE = re.compile(r"(\d+)\.\s\s*(.+)")
+TABLE_SEP_CELL_RE = re.compile(r"\s*:?-{3,}:?\s*")
+LINE_END_RE = re.compile(r"\r\n|\r|\n")
+# A line end followed by one or more blank (or whitespace-only) lines. The
+# LF-only variant is several times faster and covers most documents.
+BLANK_RUN_RE = re.compile(
+    r"(?:\r\n|\r(?!\n)|\n)(?:[^\S\r\n]*(?:\r\n|\r(?!\n)|\n))+"
+)
+LF_BLANK_RUN_RE = re.compile(r"\n(?:[^\S\r\n]*\n)+")
+FENCE = "```"
+
+
+class SourceBlock:
+    """A trimmed block of Markdown and the 1-based line it starts on."""
+
+    __slots__ = ("text", "line")
+
+    def __init__(self, text: str, line: int) -> None:
+        self.text = text
+        self.line = line
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SourceBlock):
+            return NotImplemented
+        return self.text == other.text and self.line == other.line
+
+    def __repr__(self) -> str:
+        return f"SourceBlock({self.text!r}, {self.line})"
+
+
+def count_line_ends(text: str) -> int:
+    return text.count("\n") + text.count("\r") - text.count("\r\n")
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Yield the lines of text, accepting LF, CRLF and CR line endings."""
+    pos = 0
+    for m in LINE_END_RE.finditer(text):
+        yield text[pos : m.start()]
+        pos = m.end()
+    if pos < len(text):
+        yield text[pos:]
+
+
+class BlockScanner:
+    """
+    Line-at-a-time block splitting state.
+
+    Blocks end at blank (or whitespace-only) lines, except inside a ``` fence:
+    a fenced code block runs from its opening line to the line holding the
+    closing fence and always becomes a single block, blank lines included.
+    """
+
+    __slots__ = ("current", "start", "in_fence")
+
+    def __init__(self) -> None:
+        self.current: List[str] = []
+        self.start = 0
+        self.in_fence = False
+
+    def flush(self) -> SourceBlock | None:
+        if not self.current:
+            return None
+        block = SourceBlock("\n".join(self.current).strip(), self.start)
+        self.current = []
+        return block
+
+    def feed(self, line: str, number: int) -> SourceBlock | None:
+        """Add one line (without its line end); return the block it completes, if any."""
+        if self.in_fence:
+            self.current.append(line)
+            if FENCE in line:
+                self.in_fence = False
+                return self.flush()
+            return None
+
+        stripped = line.strip()
+        if not stripped:
+            return self.flush()
+
+        block = None
+        if stripped.startswith(FENCE) and FENCE not in stripped[len(FENCE) :]:
+            block = self.flush()
+            self.in_fence = True
+        if not self.current:
+            self.start = number
+        self.current.append(line)
+        return block
+
+
+def scan_text(text: str) -> Iterator[SourceBlock]:
+    # Runs of blank lines are found with one regex over the document and the
+    # chunk between two runs is sliced out whole. Only chunks that open, close
+    # or sit inside a fence go through BlockScanner line by line.
+    scanner = BlockScanner()
+    has_cr = "\r" in text
+    blank_runs = (BLANK_RUN_RE if has_cr else LF_BLANK_RUN_RE).finditer(text)
+    line = 1
+    pos = 0
+    for sep in chain(blank_runs, [None]):
+        start, end = sep.span() if sep else (len(text), len(text))
+        chunk = text[pos:start]
+        if scanner.in_fence or FENCE in chunk:
+            for number, chunk_line in enumerate(iter_lines(chunk), start=line):
+                block = scanner.feed(chunk_line, number)
+                if block is not None:
+                    yield block
+        else:
+            block = chunk.strip()
+            if block:
+                first = line
+                if chunk[0].isspace():
+                    first += count_line_ends(chunk[: len(chunk) - len(chunk.lstrip())])
+                if has_cr:
+                    block = LINE_END_RE.sub("\n", block)
+                yield SourceBlock(block, first)
+        if sep is None:
+            break
+        if has_cr:
+            line += count_line_ends(chunk) + count_line_ends(sep.group())
+        else:
+            line += text.count("\n", pos, end)
+        pos = end
+        if scanner.in_fence:
+            blank_lines = LINE_END_RE.split(sep.group())[1:-1]
+            for number, blank in enumerate(blank_lines, start=line - len(blank_lines)):
+                scanner.feed(blank, number)
+        elif scanner.current:
+            yield scanner.flush()
+    block = scanner.flush()
+    if block is not None:
+        yield block
+
+
+def scan_lines(lines: Iterable[str]) -> Iterator[SourceBlock]:
+    scanner = BlockScanner()
+    for number, line in enumerate(lines, start=1):
+        block = scanner.feed(line.rstrip("\r\n"), number)
+        if block is not None:
+            yield block
+    block = scanner.flush()
+    if block is not None:
+        yield block
+
+
+def scan_blocks(source: str | Iterable[str]) -> Iterator[SourceBlock]:
+    """
+    Yield the blocks of a Markdown document in one pass, with their line numbers.
+
+    source is either the whole document or an iterable of lines such as an
+    open file; the document is never copied as a whole. Blocks are split as
+    described in BlockScanner.
+    """
+    if isinstance(source, str):
+        return scan_text(source)
+    return scan_lines(source)
+
+
 def markdown_to_blocks(markdown: str) -> List[str]:
     """
     Split a Markdown document into trimmed block strings separated by blank lines.
     
-    This function normalizes line endings (converts CRLF and CR to LF), splits the text on double newlines, trims surrounding whitespace from each block, and removes empty blocks.
+    Line endings may be LF, CRLF or CR. Fenced code blocks are kept whole even
+    when they contain blank lines. See scan_blocks for the streaming version.
     
     Parameters:
         markdown (str): The Markdown source text.
@@ -31,26 +200,32 @@ def markdown_to_blocks(markdown: str) -> List[str]:
     Returns:
         List[str]: A list of non-empty, trimmed Markdown block strings.
     """
-    markdown = markdown.replace("\r\n", "\n").replace("\r", "\n")
-    blocks = markdown.split("\n\n")
-    blocks = [block.strip() for block in blocks if block.strip()]
-    return blocks
+    return [block.text for block in scan_blocks(markdown)]
+
+
+def match_lines(pattern: re.Pattern[str], lines: List[str]) -> List[re.Match[str]] | None:
+    """Fullmatch pattern against every line, or return None at the first miss."""
+    matches = []
+    for line in lines:
+        m = pattern.fullmatch(line)
+        if m is None:
+            return None
+        matches.append(m)
+    return matches
+
+
+def ordered_list_matches(lines: List[str]) -> List[re.Match[str]] | None:
+    matches = match_lines(ORDERED_ITEM_RE, lines)
+    if not matches:
+        return None
+    for expected, m in enumerate(matches, start=1):
+        if int(m.group(1)) != expected:
+            return None
+    return matches
 
 
 def is_ordered_list(block: str) -> bool:
-    block = block.strip()
-    if not block:
-        return False
-    expected = 1
-    for line in block.splitlines():
-        m = fullmatch(r"(\d+)\.\s.+", line)
-        if not m:
-            return False
-        num = int(m.group(1))
-        if num != expected:
-            return False
-        expected += 1
-    return True
+    return ordered_list_matches(block.strip().splitlines()) is not None
 
 
 def split_table_row(line: str) -> List[str]:
@@ -63,193 +238,306 @@ def split_table_row(line: str) -> List[str]:
     return parts
 
 
-def is_table(block: str) -> bool:
-    lines = [ln for ln in block.splitlines() if ln.strip() != ""]
+def table_lines(lines: List[str]) -> List[str] | None:
+    """Return the non-blank lines of a table block, or None if it is not a table."""
+    lines = [ln for ln in lines if ln.strip() != ""]
     if len(lines) < 2:
-        return False
-    header = lines[0]
-    sep = lines[1]
+        return None
 
-    sep_parts = split_table_row(sep)
+    sep_parts = split_table_row(lines[1])
     if len(sep_parts) == 0:
-        return False
+        return None
 
     for token in sep_parts:
         # something like --- with optional trailing colon
-        if not fullmatch(r"\s*:?-{3,}:?\s*", token):
-            return False
+        if not TABLE_SEP_CELL_RE.fullmatch(token):
+            return None
     # header should have same number of cells as separator
-    header_parts = split_table_row(header)
-    return len(header_parts) == len(sep_parts) and len(header_parts) > 0
+    header_parts = split_table_row(lines[0])
+    if len(header_parts) == len(sep_parts) and len(header_parts) > 0:
+        return lines
+    return None
 
 
-def parse_table_block(block: str) -> HTMLNode:
-    lines = [line for line in block.splitlines() if line.strip() != ""]
-    header_line = lines[0]
-    sep_line = lines[1]
-    data_lines = lines[2:]
+def is_table(block: str) -> bool:
+    return table_lines(block.splitlines()) is not None
 
-    header_cells = split_table_row(header_line)
-    expected_cols = len(header_cells)
 
-    sep_cells = split_table_row(sep_line)
+class ClassifiedBlock:
+    """
+    A Markdown block together with its type and the work done to classify it.
+
+    lines holds the block's split lines (only the non-blank ones for tables)
+    and matches the regex matches the builders read their text from: one per
+    line for headings, quotes and lists, a single one for code blocks.
+    """
+
+    __slots__ = ("text", "block_type", "lines", "matches")
+
+    def __init__(
+        self,
+        text: str,
+        block_type: BlockType,
+        lines: List[str] | None = None,
+        matches: List[re.Match[str]] | None = None,
+    ) -> None:
+        self.text = text
+        self.block_type = block_type
+        self.lines = lines if lines is not None else []
+        self.matches = matches if matches is not None else []
+
+    def __repr__(self) -> str:
+        return f"ClassifiedBlock({self.block_type}, {self.text!r})"
+
+
+def classify_block(markdown: str) -> ClassifiedBlock:
+    if markdown == "":
+        return ClassifiedBlock(markdown, BlockType.PARAGRAPH)
+    if HEADING_RE.match(markdown):
+        lines = markdown.splitlines()
+        return ClassifiedBlock(
+            markdown, BlockType.HEADING, lines, match_lines(HEADING_LINE_RE, lines)
+        )
+    m = CODE_BLOCK_RE.fullmatch(markdown)
+    if m or CODE_RE.search(markdown):
+        return ClassifiedBlock(markdown, BlockType.CODE, matches=[m] if m else None)
+    lines = markdown.splitlines()
+    rows = table_lines(lines)
+    if rows is not None:
+        return ClassifiedBlock(markdown, BlockType.TABLE, rows)
+    matches = match_lines(QUOTE_LINE_RE, lines)
+    if matches is not None:
+        return ClassifiedBlock(markdown, BlockType.QUOTE, lines, matches)
+    matches = match_lines(UNORDERED_ITEM_RE, lines)
+    if matches is not None:
+        return ClassifiedBlock(markdown, BlockType.UNORDERED_LIST, lines, matches)
+    matches = ordered_list_matches(lines)
+    if matches is not None:
+        return ClassifiedBlock(markdown, BlockType.ORDERED_LIST, lines, matches)
+    return ClassifiedBlock(markdown, BlockType.PARAGRAPH, lines)
+
+
+def block_to_block_type(markdown) -> BlockType:
+    return classify_block(markdown).block_type
+
+
+def inline_run_nodes(text: str, basepath: str) -> Tuple[HTMLNode, ...]:
+    return tuple(text_node_to_html_node(node, basepath) for node in text_to_textnodes(text))
+
+
+class InlineMemo:
+    """inline_run_nodes for up to entries distinct runs of text, least recently used first out."""
+
+    def __init__(self, entries: int) -> None:
+        self.entries = entries
+        self.nodes = lru_cache(maxsize=entries)(inline_run_nodes)
+
+    def stats(self) -> Tuple[int, int]:
+        """Hits and misses so far."""
+        info = self.nodes.cache_info()
+        return info.hits, info.misses
+
+
+INLINE_MEMO_ENTRIES = 64 * 1024
+# Longer text is rarely repeated verbatim (repeated paragraphs are left to the
+# block memo), and hashing it to look it up would cost more than it saves.
+INLINE_MEMO_MAX_TEXT = 200
+# The memo of this process, off unless enabled with use_inline_memo(). Inline
+# parsing runs far below the block builders, so this is a process-wide
+# setting, like the timer of instrument.
+inline_memo: InlineMemo | None = None
+
+
+def use_inline_memo(entries: int) -> InlineMemo | None:
+    """Memoize the nodes of up to entries short runs of inline text; 0 turns the memo off."""
+    global inline_memo
+    if not entries:
+        inline_memo = None
+    elif inline_memo is None or inline_memo.entries != entries:
+        inline_memo = InlineMemo(entries)
+    return inline_memo
+
+
+def inline_children(text: str, basepath: str = "/") -> List[HTMLNode]:
+    memo = inline_memo
+    if memo is None or len(text) > INLINE_MEMO_MAX_TEXT:
+        return [text_node_to_html_node(node, basepath) for node in text_to_textnodes(text)]
+    # Runs with the same text share their nodes, which nothing modifies once built.
+    return list(memo.nodes(text, basepath))
+
+
+def table_cell(tag: str, cell: str, align: str, basepath: str) -> HTMLNode:
+    inline_nodes = inline_children(cell, basepath)
+    if not inline_nodes:
+        inline_nodes = [text_node_to_html_node(TextNode("", TextType.PLAIN))]
+    node = ParentNode(tag, inline_nodes)
+    if align in ["center", "right"]:
+        node.props = {"align": align}
+    return node
+
+
+def build_table(lines: List[str], basepath: str = "/") -> HTMLNode:
+    header_cells = split_table_row(lines[0])
+    expected_cols = len(header_cells)
 
     alignments = []
-    for cell in sep_cells:
+    for cell in split_table_row(lines[1]):
         cell = cell.strip()
         if cell.startswith(":") and cell.endswith(":"):
             alignments.append("center")
         elif cell.endswith(":"):
             alignments.append("right")
-        elif cell.startswith(":"):
-            alignments.append("left")
         else:
             alignments.append("left")
 
-    th_children = []
-    for i, cell in enumerate(header_cells):
-        inline_nodes = []
-        for n in text_to_textnodes(cell):
-            inline_nodes.append(text_node_to_html_node(n))
-
-        if not inline_nodes:
-            inline_nodes = [text_node_to_html_node(TextNode("", TextType.PLAIN))]
-
-        th = ParentNode("th", inline_nodes)
-        if i < len(alignments):
-            if alignments[i] in ["center", "right"]:
-                th.props = {"align": alignments[i]}
-        th_children.append(th)
-
-    thead_tr = ParentNode("tr", th_children)
-    thead = ParentNode("thead", [thead_tr])
+    def row(tag: str, cells: List[str]) -> HTMLNode:
+        return ParentNode(
+            "tr",
+            [
+                table_cell(tag, cell, alignments[i] if i < len(alignments) else "", basepath)
+                for i, cell in enumerate(cells)
+            ],
+        )
 
+    children = [ParentNode("thead", [row("th", header_cells)])]
     tbody_rows = []
-    for line in data_lines:
+    for line in lines[2:]:
         cells = split_table_row(line)
-
         while len(cells) < expected_cols:
             cells.append("")
-
-        td_children = []
-        for i, cell in enumerate(cells):
-            inline_nodes = []
-            for n in text_to_textnodes(cell):
-                inline_nodes.append(text_node_to_html_node(n))
-
-            if not inline_nodes:
-                inline_nodes = [text_node_to_html_node(TextNode("", TextType.PLAIN))]
-            td = ParentNode("td", inline_nodes)
-            if i < len(alignments):
-                if alignments[i] in ["center", "right"]:
-                    td.props = {"align": alignments[i]}
-            td_children.append(td)
-
-        tbody_rows.append(ParentNode("tr", td_children))
-
-    children = [thead]
+        tbody_rows.append(row("td", cells))
     if tbody_rows:
         children.append(ParentNode("tbody", tbody_rows))
 
     return ParentNode("table", children)
 
 
-def block_to_block_type(markdown) -> BlockType:
-    if markdown == "":
-        return BlockType.PARAGRAPH
-    if search(r"^#{1,6}\s+(.*)$", markdown):
-        return BlockType.HEADING
-    elif search(r"`{3}([\s\S]*?)`{3}", markdown):
-        return BlockType.CODE
-    elif is_table(markdown):
-        return BlockType.TABLE
-    elif all(fullmatch(r"\s{0,3}>\s?(.*)", line) for line in markdown.splitlines()):
-        return BlockType.QUOTE
-    elif all(fullmatch(r"-\s*(.+)", line) for line in markdown.splitlines()):
-        return BlockType.UNORDERED_LIST
-    elif is_ordered_list(markdown):
-        return BlockType.ORDERED_LIST
-    else:
-        return BlockType.PARAGRAPH
-
-
-def html_node_regex_match(
-    pattern: str, text: str, subparent: str | None = None
-) -> List[HTMLNode]:
-    text_nodes: List[TextNode] = []
-    html_nodes: List[HTMLNode] = []
-    for line in text.splitlines():
-        m = fullmatch(pattern, line)
-        assert m is not None
-        inline_txt = m.group(1)
-        if subparent is not None:
-            subparent_node = ParentNode(
-                subparent,
-                [
-                    text_node_to_html_node(text_node)
-                    for text_node in text_to_textnodes(inline_txt)
-                ],
-            )
-            html_nodes.append(subparent_node)
-        else:
-            text_nodes.extend(text_to_textnodes(inline_txt))
-    if subparent is not None:
-        return html_nodes
-    return [text_node_to_html_node(node) for node in text_nodes]
+def parse_table_block(block: str, basepath: str = "/") -> HTMLNode:
+    return build_table([line for line in block.splitlines() if line.strip() != ""], basepath)
 
 
-def text_to_children(text: str) -> List[HTMLNode]:
-    block_type = block_to_block_type(text)
-    match block_type:
+def match_children(
+    block: ClassifiedBlock, group: int, basepath: str, subparent: str | None = None
+) -> List[HTMLNode]:
+    """Inline children for each match; wrapped in a subparent node per match if given."""
+    if subparent is None:
+        return [
+            child for m in block.matches for child in inline_children(m.group(group), basepath)
+        ]
+    return [
+        ParentNode(subparent, inline_children(m.group(group), basepath))
+        for m in block.matches
+    ]
+
+
+def text_to_children(text: str, basepath: str = "/") -> List[HTMLNode]:
+    block = classify_block(text)
+    match block.block_type:
         case BlockType.TABLE:
             return []
         case BlockType.HEADING:
-            return html_node_regex_match(r"^#{1,6}\s+(.+)$", text)
+            return match_children(block, 2, basepath)
         case BlockType.PARAGRAPH:
-            text = text.replace("\n", " ")
-            return [text_node_to_html_node(node) for node in text_to_textnodes(text)]
+            return inline_children(text.replace("\n", " "), basepath)
         case BlockType.QUOTE:
-            return html_node_regex_match(r"\s{0,3}>\s?(.*)", text)
+            return match_children(block, 1, basepath)
         case BlockType.UNORDERED_LIST:
-            return html_node_regex_match(r"-\s*(.+)", text, "ul")
+            return match_children(block, 1, basepath, "ul")
         case BlockType.ORDERED_LIST:
-            return html_node_regex_match(r"\d+\.\s*(\S.+)", text, "ol")
+            return match_children(block, 2, basepath, "ol")
         case BlockType.CODE:
             raise AssertionError("How the hell control reach here")
 
 
-def get_block_html_node(markdown_block: str) -> HTMLNode:
-    block_type = block_to_block_type(markdown_block)
-    match block_type:
-        case BlockType.TABLE:
-            return parse_table_block(markdown_block)
-        case BlockType.PARAGRAPH:
-            return ParentNode("p", text_to_children(markdown_block))
-        case BlockType.HEADING:
-            m = fullmatch(r"^(#{1,6})\s+.*$", markdown_block)
-            assert m is not None
+def paragraph_node(block: ClassifiedBlock, basepath: str) -> HTMLNode:
+    return ParentNode("p", inline_children(block.text.replace("\n", " "), basepath))
 
-            hashes = m.group(1)
-            return ParentNode(f"h{len(hashes)}", text_to_children(markdown_block))
-        case BlockType.CODE:
-            m = fullmatch(r"`{3}[^\n]*\n([\s\S]*?)`{3}", markdown_block)
-            assert m is not None
-            code_snippet = m.group(1)
-            return ParentNode("pre", [LeafNode("code", code_snippet)])
-        case BlockType.QUOTE:
-            return ParentNode("blockquote", text_to_children(markdown_block))
-        case BlockType.UNORDERED_LIST:
-            return ParentNode("ul", text_to_children(markdown_block))
-        case BlockType.ORDERED_LIST:
-            return ParentNode("ol", text_to_children(markdown_block))
-
-
-def markdown_to_html_node(markdown: str) -> HTMLNode:
-    blocks = markdown_to_blocks(markdown)
-    root_element = ParentNode("div", [])
-    for block in blocks:
-        html_node = get_block_html_node(block)
-        if root_element.children is None:
-            raise ValueError("WTF is happening")
-        root_element.children.append(html_node)
-    return root_element
\ No newline at end of file
+
+def heading_node(block: ClassifiedBlock, basepath: str) -> HTMLNode:
+    assert block.matches, "heading line without text"
+    m = block.matches[0]
+    return ParentNode(f"h{len(m.group(1))}", match_children(block, 2, basepath))
+
+
+def code_node(block: ClassifiedBlock, basepath: str) -> HTMLNode:
+    assert block.matches, "code block without a closing fence on its own"
+    return ParentNode("pre", [LeafNode("code", block.matches[0].group(1))])
+
+
+def quote_node(block: ClassifiedBlock, basepath: str) -> HTMLNode:
+    return ParentNode("blockquote", match_children(block, 1, basepath))
+
+
+def unordered_list_node(block: ClassifiedBlock, basepath: str) -> HTMLNode:
+    return ParentNode("ul", match_children(block, 1, basepath, "ul"))
+
+
+def ordered_list_node(block: ClassifiedBlock, basepath: str) -> HTMLNode:
+    return ParentNode("ol", match_children(block, 2, basepath, "ol"))
+
+
+def table_node(block: ClassifiedBlock, basepath: str) -> HTMLNode:
+    return build_table(block.lines, basepath)
+
+
+BLOCK_BUILDERS: Dict[BlockType, Callable[[ClassifiedBlock, str], HTMLNode]] = {
+    BlockType.PARAGRAPH: paragraph_node,
+    BlockType.HEADING: heading_node,
+    BlockType.CODE: code_node,
+    BlockType.QUOTE: quote_node,
+    BlockType.UNORDERED_LIST: unordered_list_node,
+    BlockType.ORDERED_LIST: ordered_list_node,
+    BlockType.TABLE: table_node,
+}
+
+
+def get_block_html_node(markdown_block: str, basepath: str = "/") -> HTMLNode:
+    block = classify_block(markdown_block)
+    return BLOCK_BUILDERS[block.block_type](block, basepath)
+
+
+def memoized_block_node(markdown_block: str, basepath: str, memo: BlockMemo) -> HTMLNode:
+    """The block as a single leaf of its rendered HTML, rendered only on a memo miss."""
+    key = (basepath, markdown_block)
+    html = memo.get(key)
+    if html is None:
+        html = get_block_html_node(markdown_block, basepath).to_html()
+        memo.put(key, html)
+    return LeafNode(None, html)
+
+
+def markdown_to_html_blocks(
+    markdown: str | Iterable[str], basepath: str = "/", memo: BlockMemo | None = None
+) -> Iterator[HTMLNode]:
+    """
+    Yield the HTML node of each block as soon as it has been parsed.
+
+    With memo, blocks seen before are not parsed again; every block is then
+    yielded as a leaf holding its rendered HTML instead of as a tree.
+    """
+    for block in scan_blocks(markdown):
+        try:
+            if memo is None:
+                yield get_block_html_node(block.text, basepath)
+            else:
+                yield memoized_block_node(block.text, basepath, memo)
+        except ValueError as e:
+            raise ValueError(f"line {block.line}: {e}") from e
+
+
+def markdown_to_html_node(
+    markdown: str | Iterable[str], basepath: str = "/", memo: BlockMemo | None = None
+) -> HTMLNode:
+    return ParentNode("div", list(markdown_to_html_blocks(markdown, basepath, memo)))
+
+
+def markdown_to_html_stream(
+    lines: Iterable[str], basepath: str = "/", memo: BlockMemo | None = None
+) -> HTMLNode:
+    """
+    Like markdown_to_html_node, but parse each block only when it is rendered.
+
+    The root's children are a generator over lines (e.g. an open file), so
+    write_html holds one block at a time and the node can be rendered once.
+    """
+    return ParentNode("div", markdown_to_html_blocks(lines, basepath, memo))
@@ -0,0 +1,78 @@
+"""
+In-memory memo of rendered blocks.
+
+Documents are edited a block at a time and share boilerplate blocks (footers,
+notices) across pages, so most blocks a long-running process parses it has
+parsed before. The memo maps a block's text and the basepath to the block's
+rendered HTML. Strings are immutable, so a hit can be shared by every page
+that contains the block, and the memory they take is known exactly, which
+bounds the memo: once it holds more than max_bytes, the least recently used
+blocks are dropped.
+
+The memo is process-local and safe to use from several threads. Pickling
+one, e.g. to hand it to a worker process, carries its bound but none of its
+entries.
+"""
+from collections import OrderedDict
+import sys
+import threading
+from typing import Tuple
+
+BLOCK_MEMO_SIZE = 64 * 1024 * 1024
+
+# (basepath, block text)
+Key = Tuple[str, str]
+
+
+class BlockMemo:
+    def __init__(self, max_bytes: int = BLOCK_MEMO_SIZE) -> None:
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[Key, str] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __reduce__(self) -> Tuple[type, Tuple[int]]:
+        return (BlockMemo, (self.max_bytes,))
+
+    @staticmethod
+    def entry_size(key: Key, html: str) -> int:
+        return sys.getsizeof(key[1]) + sys.getsizeof(html)
+
+    def get(self, key: Key) -> str | None:
+        with self.lock:
+            html = self.entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return html
+
+    def put(self, key: Key, html: str) -> None:
+        size = self.entry_size(key, html)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= self.entry_size(key, previous)
+            self.entries[key] = html
+            self.size += size
+            while self.size > self.max_bytes:
+                old_key, old_html = self.entries.popitem(last=False)
+                self.size -= self.entry_size(old_key, old_html)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0
+        return (
+            f"{self.hits}/{lookups} blocks from memo ({rate:.0f}%), "
+            f"{len(self.entries)} held in {self.size / 1e6:.1f} MB"
+        )
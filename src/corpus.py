@@ -0,0 +1,210 @@
+"""
+Deterministic synthetic Markdown corpus for benchmarks.
+
+Every profile stresses a different part of the pipeline: many small pages,
+a few huge ones, and pages dominated by tables, links, code blocks or nested
+markup. The same seed and scale always produce byte-identical documents, so
+timings taken on different commits measure the same work.
+
+The block grammar has no nested containers (quotes and lists are flat), so
+"nested" pages nest at the inline level instead: emphasis inside emphasis
+inside link text, and multi-level quote markers.
+"""
+from pathlib import Path
+import random
+from typing import Callable, Dict, List
+
+WORDS = (
+    "loom static site page block inline parser render template markdown "
+    "quick brown fox jumps over lazy dog river stone cloud signal vector "
+    "thread buffer cache index table column header value render output"
+).split()
+
+TEMPLATE = (
+    "<!DOCTYPE html>\n<html>\n<head>\n<title>{{ Title }}</title>\n"
+    '<link href="/index.css" rel="stylesheet">\n</head>\n'
+    "<body>\n<article>\n{{ Content }}\n</article>\n</body>\n</html>\n"
+)
+
+
+def words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def sentence(rng: random.Random) -> str:
+    """A short run of text with a sprinkling of inline markup."""
+    parts = [words(rng, rng.randint(3, 8))]
+    kind = rng.randrange(6)
+    if kind == 0:
+        parts.append(f"**{words(rng, 2)}**")
+    elif kind == 1:
+        parts.append(f"_{words(rng, 2)}_")
+    elif kind == 2:
+        parts.append(f"`{rng.choice(WORDS)}()`")
+    elif kind == 3:
+        parts.append(f"[{words(rng, 2)}](/{rng.choice(WORDS)}/{rng.randrange(1000)})")
+    parts.append(words(rng, rng.randint(2, 6)) + ".")
+    return " ".join(parts)
+
+
+def paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(sentence(rng) for _ in range(sentences))
+
+
+def mixed_block(rng: random.Random) -> str:
+    kind = rng.randrange(8)
+    if kind == 0:
+        return f"## {words(rng, 4).capitalize()}"
+    if kind == 1:
+        return "\n".join(f"- {sentence(rng)}" for _ in range(rng.randint(2, 5)))
+    if kind == 2:
+        return "\n".join(f"{i}. {sentence(rng)}" for i in range(1, rng.randint(3, 6)))
+    if kind == 3:
+        return "\n".join(f"> {sentence(rng)}" for _ in range(rng.randint(1, 3)))
+    if kind == 4:
+        return code_block(rng, rng.randint(2, 6))
+    return paragraph(rng, rng.randint(2, 5))
+
+
+def code_block(rng: random.Random, lines: int) -> str:
+    body = [f"def {rng.choice(WORDS)}_{rng.randrange(100)}(value):"]
+    for _ in range(lines):
+        body.append(f"    value = value + {rng.randrange(100)}  # {words(rng, 3)}")
+        if rng.randrange(5) == 0:
+            body.append("")
+    body.append("    return value")
+    return "```\n" + "\n".join(body) + "\n```"
+
+
+def table(rng: random.Random, rows: int, columns: int) -> str:
+    aligns = [rng.choice(("---", ":---", "---:", ":---:")) for _ in range(columns)]
+    lines = [
+        "| " + " | ".join(words(rng, 2) for _ in range(columns)) + " |",
+        "| " + " | ".join(aligns) + " |",
+    ]
+    for _ in range(rows):
+        cells = []
+        for _ in range(columns):
+            cell = words(rng, rng.randint(1, 3))
+            if rng.randrange(4) == 0:
+                cell = f"**{cell}**"
+            elif rng.randrange(6) == 0:
+                cell = f"[{cell}](/{rng.choice(WORDS)}.html)"
+            cells.append(cell)
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def link_paragraph(rng: random.Random, links: int) -> str:
+    parts = []
+    for _ in range(links):
+        parts.append(words(rng, rng.randint(1, 4)))
+        target = f"/{rng.choice(WORDS)}/{rng.randrange(10000)}.html"
+        if rng.randrange(5) == 0:
+            parts.append(f"![{words(rng, 2)}](/images/{rng.randrange(100)}.png)")
+        else:
+            parts.append(f"[{words(rng, 2)}]({target})")
+    return " ".join(parts) + "."
+
+
+def nested_text(rng: random.Random) -> str:
+    """
+    Nest markup as deep as the inline grammar allows.
+
+    A delimiter cannot nest inside itself, but link text is scanned afresh,
+    so italic > bold > link > italic > bold > code is the deepest chain.
+    """
+    inner = f"_{words(rng, 1)} **{words(rng, 1)} `{rng.choice(WORDS)}`**_"
+    link = f"[{words(rng, 1)} {inner}](/{rng.choice(WORDS)}/{rng.randrange(100)})"
+    return f"{words(rng, 2)} _{words(rng, 1)} **{words(rng, 1)} {link}** {words(rng, 1)}_."
+
+
+def nested_block(rng: random.Random) -> str:
+    lines = range(rng.randint(2, 5))
+    if rng.randrange(2):
+        # Quote markers inside a quote stay literal text, but still have to be scanned.
+        return "\n".join("> " * rng.randint(1, 6) + nested_text(rng) for _ in lines)
+    return "\n".join(f"- {nested_text(rng)}" for _ in lines)
+
+
+def page(title: str, blocks: List[str]) -> str:
+    return f"# {title}\n\n" + "\n\n".join(blocks) + "\n"
+
+
+def small_pages(rng: random.Random, scale: float) -> List[str]:
+    return [
+        page(f"Note {i}", [mixed_block(rng) for _ in range(rng.randint(4, 10))])
+        for i in range(max(1, int(200 * scale)))
+    ]
+
+
+def huge_pages(rng: random.Random, scale: float) -> List[str]:
+    return [
+        page(f"Reference {i}", [mixed_block(rng) for _ in range(max(1, int(3000 * scale)))])
+        for i in range(2)
+    ]
+
+
+def table_pages(rng: random.Random, scale: float) -> List[str]:
+    return [
+        page(
+            f"Tables {i}",
+            [block for _ in range(10) for block in (paragraph(rng, 1), table(rng, 20, 5))],
+        )
+        for i in range(max(1, int(20 * scale)))
+    ]
+
+
+def link_pages(rng: random.Random, scale: float) -> List[str]:
+    return [
+        page(f"Links {i}", [link_paragraph(rng, rng.randint(10, 40)) for _ in range(20)])
+        for i in range(max(1, int(30 * scale)))
+    ]
+
+
+def code_pages(rng: random.Random, scale: float) -> List[str]:
+    return [
+        page(
+            f"Code {i}",
+            [block for _ in range(15) for block in (paragraph(rng, 1), code_block(rng, 12))],
+        )
+        for i in range(max(1, int(30 * scale)))
+    ]
+
+
+def nested_pages(rng: random.Random, scale: float) -> List[str]:
+    return [
+        page(f"Nested {i}", [nested_block(rng) for _ in range(20)])
+        for i in range(max(1, int(30 * scale)))
+    ]
+
+
+PROFILES: Dict[str, Callable[[random.Random, float], List[str]]] = {
+    "small": small_pages,
+    "huge": huge_pages,
+    "tables": table_pages,
+    "links": link_pages,
+    "code": code_pages,
+    "nested": nested_pages,
+}
+
+
+def generate_corpus(scale: float = 1.0, seed: int = 0) -> Dict[str, List[str]]:
+    """Return the Markdown documents of every profile, keyed by profile name."""
+    # Each profile has its own generator, so resizing one leaves the others unchanged.
+    return {
+        name: make(random.Random(f"{seed}:{name}"), scale) for name, make in PROFILES.items()
+    }
+
+
+def write_corpus(root: Path, corpus: Dict[str, List[str]]) -> None:
+    """Lay the corpus out as a site under root: content/, static/ and template.html."""
+    content = root / "content"
+    for name, documents in corpus.items():
+        (content / name).mkdir(parents=True, exist_ok=True)
+        for i, document in enumerate(documents):
+            (content / name / f"page{i}.md").write_text(document)
+    (content / "index.md").write_text(page("Corpus", [paragraph(random.Random(0), 3)]))
+    (root / "static").mkdir(exist_ok=True)
+    (root / "static" / "index.css").write_text("body { margin: 0 auto; max-width: 40em; }\n")
+    (root / "template.html").write_text(TEMPLATE)
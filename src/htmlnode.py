@@ -1,8 +1,11 @@
 from __future__ import annotations
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, TextIO, Tuple
 
 
 class HTMLNode:
+    # Subclasses declare empty __slots__ too, so no node carries a __dict__.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: str | None = None,
@@ -16,15 +19,55 @@ class HTMLNode:
         self.props: Dict[str, str] | None = props
 
     def to_html(self) -> str:
+        parts: List[str] = []
+        self._emit_html(parts.append)
+        return "".join(parts)
+
+    def write_html(self, out: TextIO) -> None:
+        """
+        Write this node's HTML to out, which only needs a write(str) method.
+
+        Every node of a tree writes into the same out, so rendering a page
+        never builds intermediate strings for its subtrees.
+        """
+        self._emit_html(out.write)
+
+    def html_parts(self) -> Tuple[str, str | None]:
+        """
+        Return the HTML that precedes this node's children and its closing tag.
+
+        Nodes without children return their complete HTML and None.
+        """
         raise NotImplementedError("To be impletemented by subclasses")
 
+    def _emit_html(self, write: Callable[[str], object]) -> None:
+        # Walk the tree with an explicit stack of (remaining children, closing
+        # tag) pairs instead of recursing, so arbitrarily deep documents render
+        # without hitting the interpreter's recursion limit. Each node is
+        # visited once and each piece of output is written once.
+        opening, closing = self.html_parts()
+        write(opening)
+        if closing is None:
+            return
+        stack: List[Tuple[Iterator[HTMLNode], str]] = [
+            (iter(self.children or ()), closing)
+        ]
+        while stack:
+            children, closing = stack[-1]
+            for child in children:
+                opening, child_closing = child.html_parts()
+                write(opening)
+                if child_closing is not None:
+                    stack.append((iter(child.children or ()), child_closing))
+                    break
+            else:
+                stack.pop()
+                write(closing)
+
     def props_to_html(self) -> str:
         if not self.props:
             return ""
-        final_str = ""
-        for prop, value in self.props.items():
-            final_str += f' {prop}="{value}"'
-        return final_str
+        return "".join([f' {prop}="{value}"' for prop, value in self.props.items()])
 
     def __repr__(self) -> str:
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
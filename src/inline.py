@@ -1,7 +1,28 @@
-from typing import List, Tuple
+import re
+from typing import Dict, List, Tuple
 
 from textnode import TextType, TextNode
-from re import findall
+
+IMAGE_RE = re.compile(r"!\[([\w\s]+)\]\(([^\(\)]*)\)")
+LINK_RE = re.compile(r"(?<!!)\[([^\]]*)\]\(([^)\s]+(?:\([^)]*\)[^)\s]*)*)\)")
+# One search finds the next inline token and tells which kind it is; the
+# plain text in between is skipped inside the regex engine.
+TOKEN_RE = re.compile(
+    r"(?=[`*_!\[])"
+    r"(?:(?P<code>`)"
+    r"|(?P<bold>\*\*)"
+    r"|(?P<underscore>_)"
+    r"|(?P<image>!\[(?P<alt>[\w\s]+)\]\((?P<src>[^\(\)]*)\))"
+    r"|(?P<link>(?<!!)\[(?:(?P<plain_label>[^\]`*_!\[]*)|(?P<label>[^\]]*))\]"
+    r"\((?P<href>[^)\s]+(?:\([^)]*\)[^)\s]*)*)\)))"
+)
+
+# How a scan for a closing delimiter can fail.
+UNCLOSED = -1
+INTERRUPTED = -2
+
+# (start offset, closers) -> how a scan for an emphasis closer from there failed
+ScanMemo = Dict[Tuple[int, Tuple[str, ...]], int]
 
 
 def split_nodes_delimiter(
@@ -27,61 +48,185 @@ def split_nodes_delimiter(
 
 
 def extract_markdown_images(text: str) -> List[Tuple[str, str]]:
-    matches = findall(r"!\[([\w\s]+)\]\(([^\(\)]*)\)", text)
+    matches = IMAGE_RE.findall(text)
     return matches
 
 
 def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
-    return findall(r"(?<!!)\[([^\]]*)\]\(([^)\s]+(?:\([^)]*\)[^)\s]*)*)\)", text)
+    return LINK_RE.findall(text)
 
 
-def split_nodes_image(old_nodes: List[TextNode]) -> List[TextNode]:
-    new_nodes: List[TextNode] = []
-    for node in old_nodes:
-        txt = node.text
-        this_type = node.node_type
-        images = extract_markdown_images(txt)
-        if not images:
-            new_nodes.append(node)
-            continue
-        for image in images:
-            parts = txt.split(f"![{image[0]}]({image[1]})")
-            if parts[0] != "":
-                new_nodes.append(TextNode(parts[0], this_type))
-            new_nodes.append(TextNode(image[0], TextType.IMAGE, image[1]))
-            txt = parts[1]
-        if txt != "":
-            new_nodes.append(TextNode(txt, this_type))
-
-    return new_nodes
-
-
-def split_nodes_link(old_nodes: List[TextNode]) -> List[TextNode]:
+def split_nodes_matches(
+    old_nodes: List[TextNode], pattern: re.Pattern, text_type: TextType
+) -> List[TextNode]:
+    # Walk the match offsets of each node's text once, slicing out the text
+    # between matches, so every node is scanned a single time however many
+    # images or links it holds.
     new_nodes: List[TextNode] = []
     for old_node in old_nodes:
         txt = old_node.text
         this_type = old_node.node_type
-        links = extract_markdown_links(txt)
-        if not links:
+        pos = 0
+        for m in pattern.finditer(txt):
+            if m.start() > pos:
+                new_nodes.append(TextNode(txt[pos : m.start()], this_type))
+            new_nodes.append(TextNode(m.group(1), text_type, m.group(2)))
+            pos = m.end()
+        if pos == 0:
             new_nodes.append(old_node)
-            continue
-        for link in links:
-            parts = txt.split(f"[{link[0]}]({link[1]})")
-            if parts[0] != "":
-                new_nodes.append(TextNode(parts[0], this_type))
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            txt = parts[1]
-        if txt != "":
-            new_nodes.append(TextNode(txt, this_type))
-
+        elif pos < len(txt):
+            new_nodes.append(TextNode(txt[pos:], this_type))
     return new_nodes
 
 
-def text_to_textnodes(text: str) -> list[TextNode]:
-    nodes: List[TextNode] = [TextNode(text, TextType.PLAIN)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+def split_nodes_image(old_nodes: List[TextNode]) -> List[TextNode]:
+    return split_nodes_matches(old_nodes, IMAGE_RE, TextType.IMAGE)
+
+
+def split_nodes_link(old_nodes: List[TextNode]) -> List[TextNode]:
+    return split_nodes_matches(old_nodes, LINK_RE, TextType.LINK)
+
+
+def underscore_can_open(text: str, pos: int) -> bool:
+    # An opening _ must start a word: snake_case identifiers stay plain text.
+    before = text[pos - 1] if pos > 0 else " "
+    after = text[pos + 1] if pos + 1 < len(text) else " "
+    return not (before.isalnum() or before == "_" or after.isspace() or after == "_")
+
+
+def underscore_can_close(text: str, pos: int) -> bool:
+    before = text[pos - 1] if pos > 0 else " "
+    after = text[pos + 1] if pos + 1 < len(text) else " "
+    return not (before.isspace() or before == "_" or after.isalnum() or after == "_")
+
+
+def wrap_inline(
+    inner: List[TextNode], text_type: TextType, url: str | None = None
+) -> TextNode:
+    if len(inner) == 1 and inner[0].node_type == TextType.PLAIN:
+        return TextNode(inner[0].text, text_type, url)
+    if not inner:
+        return TextNode("", text_type, url)
+    return TextNode("".join(n.text for n in inner), text_type, url, inner)
+
+
+def scan_inline(text: str, pos: int, end: int) -> List[TextNode]:
+    """
+    Tokenize text[pos:end] left to right into TextNodes.
+
+    Open emphasis is kept on a stack rather than in nested calls, so text with
+    any number of unmatched delimiters is parsed at a constant depth. When an
+    emphasis fails to close, either because the text ran out or because an
+    enclosing one closed first, its delimiter becomes plain text and the scan
+    resumes just after it in the emphasis around it. Failures are remembered
+    by start and closers, the only things a scan depends on, so no failed
+    scan is repeated, and one that fails with the closers of the emphasis
+    around it fails that emphasis too, without rescanning.
+    """
+    failed: ScanMemo = {}
+    # The innermost open emphasis: its delimiter, where the delimiter is and
+    # where its text starts, the delimiters of it and every enclosing
+    # emphasis (each once, innermost last), and its nodes so far. Text
+    # between tokens is plain. It is only emitted when the next node is, so
+    # unmatched delimiters simply stay part of the surrounding text.
+    delimiter, opened, start, closers = "", pos, pos, ()
+    nodes: List[TextNode] = []
+    plain_start = pos
+    # The enclosing emphasis, outermost first, in the same form.
+    stack: List[Tuple[str, int, int, Tuple[str, ...], List[TextNode], int]] = []
+
+    while True:
+        m = TOKEN_RE.search(text, pos, end)
+        if m is None:
+            if not stack:
+                break
+            outcome = UNCLOSED
+        else:
+            pos = m.start()
+            kind = m.lastgroup
+
+            if kind == "bold" or kind == "underscore":
+                found = m.group()
+                if found in closers and (kind == "bold" or underscore_can_close(text, pos)):
+                    if closers[-1] != found:
+                        outcome = INTERRUPTED
+                    else:
+                        if pos > plain_start:
+                            nodes.append(TextNode(text[plain_start:pos], TextType.PLAIN))
+                        inner = nodes
+                        opener = opened
+                        delimiter, opened, start, closers, nodes, plain_start = stack.pop()
+                        if opener > plain_start:
+                            nodes.append(TextNode(text[plain_start:opener], TextType.PLAIN))
+                        if inner:
+                            text_type = TextType.BOLD if kind == "bold" else TextType.ITALIC
+                            nodes.append(wrap_inline(inner, text_type))
+                        pos = plain_start = m.end()
+                        continue
+                elif kind == "underscore" and not underscore_can_open(text, pos):
+                    pos += 1
+                    continue
+                else:
+                    nested = tuple(c for c in closers if c != found) + (found,)
+                    known = failed.get((m.end(), nested))
+                    if known is None:
+                        stack.append((delimiter, opened, start, closers, nodes, plain_start))
+                        delimiter, opened, closers, nodes = found, pos, nested, []
+                        pos = start = plain_start = m.end()
+                        continue
+                    pos = m.end()
+                    if nested != closers:
+                        # An unmatched _ is just an underscore.
+                        continue
+                    outcome = known
+            else:
+                if pos > plain_start:
+                    nodes.append(TextNode(text[plain_start:pos], TextType.PLAIN))
+                if kind == "code":
+                    close = text.find("`", pos + 1, end)
+                    if close == -1:
+                        raise ValueError(f"Could Not find closing delimiter ` in {text!r}")
+                    if close > pos + 1:
+                        nodes.append(TextNode(text[pos + 1 : close], TextType.CODE))
+                    pos = close + 1
+                elif kind == "image":
+                    nodes.append(TextNode(m.group("alt"), TextType.IMAGE, m.group("src")))
+                    pos = m.end()
+                else:
+                    label = m.group("plain_label")
+                    if label is not None:
+                        nodes.append(TextNode(label, TextType.LINK, m.group("href")))
+                    else:
+                        inner = scan_inline(text, *m.span("label"))
+                        nodes.append(wrap_inline(inner, TextType.LINK, m.group("href")))
+                    pos = m.end()
+                plain_start = pos
+                continue
+
+        # The innermost emphasis failed to close. The one around it resumes
+        # just after its delimiter; if both are _, that scans with the same
+        # closers, so it fails the same way.
+        while True:
+            failed[(start, closers)] = outcome
+            if outcome == UNCLOSED and delimiter == "**":
+                raise ValueError(f"Could Not find closing delimiter ** in {text!r}")
+            pos = start
+            failed_closers = closers
+            delimiter, opened, start, closers, nodes, plain_start = stack.pop()
+            if closers != failed_closers:
+                break
+
+    if end > plain_start:
+        nodes.append(TextNode(text[plain_start:end], TextType.PLAIN))
     return nodes
+
+
+def text_to_textnodes(text: str) -> list[TextNode]:
+    """
+    Parse inline Markdown into TextNodes in a single left-to-right pass.
+
+    Code spans, images and links are recognised where they start, and bold
+    and italic may nest inside each other and inside link text. An unclosed
+    ** or ` raises ValueError; an unmatched _ is kept as plain text.
+    """
+    return scan_inline(text, 0, len(text))
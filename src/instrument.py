@@ -0,0 +1,331 @@
+"""
+Opt-in timing of the stages of a build: aggregate profiles and trace timelines.
+
+While a page is profiled, the functions at each stage boundary (parse cache
+and block memo lookups, block scanning, classification, inline parsing,
+tables, tree building, rendering and template substitution) are swapped for
+timed wrappers in the modules that call them, and swapped back when the page
+is done. A build without --profile runs exactly the undecorated code, so
+instrumentation costs nothing when off.
+
+Stages nest (a table parses the inline text of its cells), so each stage is
+charged only its own time: entering a stage pauses the one it was called
+from. Whatever no stage claims, i.e. reading the source and writing the
+output, is charged to "io".
+
+A Tracer instead records when each coarse step (page read, parse, render,
+write, asset copy) ran, in which process and thread, as Chrome Trace Event
+JSON for Perfetto or chrome://tracing. It is passed down explicitly, and
+code given None records nothing.
+"""
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+import json
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Callable, ContextManager, Dict, Iterator, List, Set, Tuple
+
+import block
+from htmlnode import HTMLNode
+from parsecache import ParseCache
+from template import Template
+
+REPORT_VERSION = 1
+STAGES = (
+    "io",
+    "cache",
+    "memo",
+    "blocks",
+    "classify",
+    "inline",
+    "table",
+    "tree",
+    "render",
+    "template",
+)
+
+
+class StageTimer:
+    """Charges elapsed time to the innermost running stage."""
+
+    __slots__ = ("totals", "stack", "mark", "blocks", "nodes")
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self.stack: List[str] = []
+        self.mark = time.perf_counter()
+        self.blocks = 0
+        self.nodes = 0
+
+    def enter(self, stage: str) -> None:
+        now = time.perf_counter()
+        if self.stack:
+            self.totals[self.stack[-1]] += now - self.mark
+        self.stack.append(stage)
+        self.mark = now
+
+    def exit(self) -> None:
+        now = time.perf_counter()
+        self.totals[self.stack.pop()] += now - self.mark
+        self.mark = now
+
+    def count(self, node: HTMLNode) -> None:
+        """Count a block's nodes without charging the walk to any stage."""
+        now = time.perf_counter()
+        self.blocks += 1
+        pending = [node]
+        while pending:
+            current = pending.pop()
+            self.nodes += 1
+            if isinstance(current.children, list):
+                pending.extend(current.children)
+        self.mark += time.perf_counter() - now
+
+
+# The timer of the page being profiled in this process, if any.
+active: StageTimer | None = None
+
+
+def timed(stage: str, func: Callable) -> Callable:
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        timer = active
+        if timer is None:
+            return func(*args, **kwargs)
+        timer.enter(stage)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timer.exit()
+
+    return wrapper
+
+
+def timed_generator(stage: str, func: Callable[..., Iterator]) -> Callable[..., Iterator]:
+    # A generator runs a little at every next(), so time each step.
+    def steps(iterator: Iterator) -> Iterator:
+        while True:
+            timer = active
+            if timer is not None:
+                timer.enter(stage)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                if timer is not None:
+                    timer.exit()
+            yield item
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return steps(func(*args, **kwargs))
+
+    return wrapper
+
+
+def counted(func: Callable[..., HTMLNode]) -> Callable[..., HTMLNode]:
+    timed_func = timed("tree", func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        node = timed_func(*args, **kwargs)
+        if active is not None:
+            active.count(node)
+        return node
+
+    return wrapper
+
+
+def counted_load(func: Callable[..., HTMLNode | None]) -> Callable[..., HTMLNode | None]:
+    # A tree served from the parse cache never passes through
+    # get_block_html_node, so count its blocks here.
+    timed_func = timed("cache", func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        node = timed_func(*args, **kwargs)
+        if node is not None and active is not None:
+            for child in node.children or ():
+                active.count(child)
+        return node
+
+    return wrapper
+
+
+# (owner, attribute, wrap) for every stage boundary.
+HOOKS: List[Tuple[object, str, Callable[[Callable], Callable]]] = [
+    (ParseCache, "load", counted_load),
+    (block, "scan_blocks", lambda f: timed_generator("blocks", f)),
+    (block, "classify_block", lambda f: timed("classify", f)),
+    # Inline parsing and the conversion of its TextNodes, once per run of text.
+    (block, "inline_children", lambda f: timed("inline", f)),
+    (block, "build_table", lambda f: timed("table", f)),
+    (block, "get_block_html_node", counted),
+    # Memo lookups, and rendering the blocks that missed.
+    (block, "memoized_block_node", lambda f: timed("memo", f)),
+    (HTMLNode, "write_html", lambda f: timed("render", f)),
+    (Template, "write", lambda f: timed("template", f)),
+]
+
+
+@contextmanager
+def profile_page() -> Iterator[StageTimer]:
+    """Time the stages of everything run inside the block."""
+    global active
+    originals = [getattr(owner, name) for owner, name, _ in HOOKS]
+    for (owner, name, wrap), original in zip(HOOKS, originals):
+        setattr(owner, name, wrap(original))
+    active = timer = StageTimer()
+    timer.enter("io")
+    try:
+        yield timer
+    finally:
+        timer.exit()
+        active = None
+        for (owner, name, _), original in zip(HOOKS, originals):
+            setattr(owner, name, original)
+
+
+def page_record(source: Path, timer: StageTimer) -> Dict:
+    return {
+        "source": source.as_posix(),
+        "seconds": sum(timer.totals.values()),
+        "stages": timer.totals,
+        "blocks": timer.blocks,
+        "nodes": timer.nodes,
+    }
+
+
+class BuildProfile:
+    """Per-page stage timings of a build, plus the wall time of its phases."""
+
+    def __init__(self, top: int = 10) -> None:
+        self.top = top
+        self.pages: List[Dict] = []
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self) -> Dict:
+        stages = dict.fromkeys(STAGES, 0.0)
+        for page in self.pages:
+            for stage, seconds in page["stages"].items():
+                stages[stage] += seconds
+        pages = sorted(self.pages, key=lambda page: page["source"])
+        return {
+            "version": REPORT_VERSION,
+            "phases": self.phases,
+            "stages": stages,
+            "pages_built": len(pages),
+            "blocks": sum(page["blocks"] for page in pages),
+            "nodes": sum(page["nodes"] for page in pages),
+            "slowest": sorted(pages, key=lambda page: page["seconds"], reverse=True)[: self.top],
+            "pages": pages,
+        }
+
+    def write(self, path: Path) -> Dict:
+        report = self.report()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=1) + "\n")
+        return report
+
+
+def format_report(report: Dict) -> str:
+    lines = [f"{'phase':<12}{'ms':>10}"]
+    for name, seconds in report["phases"].items():
+        lines.append(f"{name:<12}{seconds * 1000:>10.1f}")
+    # Stage times add up across worker processes, so they can exceed the
+    # wall time of the pages phase.
+    total = sum(report["stages"].values())
+    lines.append(f"\n{'stage':<12}{'ms':>10}{'share':>8}")
+    for stage, seconds in report["stages"].items():
+        share = seconds / total * 100 if total else 0
+        lines.append(f"{stage:<12}{seconds * 1000:>10.1f}{share:>7.1f}%")
+    lines.append(
+        f"\n{report['pages_built']} pages, {report['blocks']} blocks, {report['nodes']} nodes"
+    )
+    if report["slowest"]:
+        lines.append(f"\n{'slowest pages':<48}{'ms':>10}{'nodes':>8}")
+        for page in report["slowest"]:
+            ms = page["seconds"] * 1000
+            lines.append(f"{page['source']:<48}{ms:>10.1f}{page['nodes']:>8}")
+    return "\n".join(lines)
+
+
+class Tracer:
+    """Collects Chrome Trace Event "complete" events, one per finished span."""
+
+    def __init__(self) -> None:
+        self.events: List[Dict] = []
+        self.threads: Set[Tuple[int, int]] = set()
+
+    @contextmanager
+    def span(self, name: str, category: str = "build", **args: str) -> Iterator[None]:
+        # The monotonic clock is shared by every process on the machine, so
+        # spans recorded in worker processes line up with the parent's.
+        start = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            end = time.monotonic_ns()
+            pid, tid = os.getpid(), threading.get_native_id()
+            if (pid, tid) not in self.threads:
+                self.threads.add((pid, tid))
+                self.events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": pid,
+                        "tid": tid,
+                        "args": {"name": threading.current_thread().name},
+                    }
+                )
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": (end - start) / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            self.events.append(event)
+
+    def write(self, path: Path) -> None:
+        main = os.getpid()
+        pids = sorted({event["pid"] for event in self.events} - {main})
+        names = [(main, "build")] + [(pid, f"worker {i + 1}") for i, pid in enumerate(pids)]
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": name}}
+            for pid, name in names
+        ]
+        # Workers trace every page separately, so each of them names its
+        # thread many times over; keep one name per thread.
+        named: Set[Tuple[int, int]] = set()
+        spans: List[Dict] = []
+        for event in self.events:
+            if event["ph"] != "M":
+                spans.append(event)
+            elif (event["pid"], event["tid"]) not in named:
+                named.add((event["pid"], event["tid"]))
+                metadata.append(event)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"traceEvents": metadata + spans, "displayTimeUnit": "ms"}))
+
+
+def span(tracer: Tracer | None, name: str, category: str = "build", **args: str) -> ContextManager:
+    """tracer.span(...), or a no-op when there is no tracer."""
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, category, **args)
@@ -1,8 +1,10 @@
-from typing import Dict
+from typing import Dict, Tuple
 from htmlnode import HTMLNode
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self, tag: str | None, value: str, props: Dict[str, str] | None = None
     ) -> None:
@@ -15,3 +17,6 @@ class LeafNode(HTMLNode):
             return self.value
         props_html = self.props_to_html()
         return f"<{self.tag}{props_html}>{self.value}</{self.tag}>"
+
+    def html_parts(self) -> Tuple[str, None]:
+        return self.to_html(), None
@@ -1,15 +1,52 @@
+import argparse
+from contextlib import contextmanager, nullcontext
+import cProfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 import logging
-import sys
+from multiprocessing import get_context
 import os
 from pathlib import Path
 import re
-import shutil
+import time
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
 
-from block import markdown_to_html_node
+from assets import COPY_WORKERS, SyncStats, remove_output, sync_tree
+from block import (
+    INLINE_MEMO_ENTRIES,
+    markdown_to_html_node,
+    markdown_to_html_stream,
+    use_inline_memo,
+)
+from blockmemo import BLOCK_MEMO_SIZE, BlockMemo
+from instrument import (
+    BuildProfile,
+    Tracer,
+    format_report,
+    page_record,
+    profile_page,
+    span,
+)
+from manifest import BuildManifest, file_digest
+from parsecache import CACHE_PATH, CACHE_SIZE, ParseCache
+from publish import discard_staging, publish_output, stage_output
+from template import Template
 
+MANIFEST_PATH = Path(".loom") / "manifest.json"
+PROFILE_PATH = Path(".loom") / "profile.json"
+PAGE_PLACEHOLDERS = ("Title", "Content")
+# Sources larger than this are converted block by block straight into the
+# output file instead of being read and parsed as a whole.
+STREAM_THRESHOLD = 16 * 1024 * 1024
+TITLE_RE = re.compile(r"^#\s+(.+)$", re.MULTILINE)
 
-def extract_title(markdown: str) -> str:
-    match = re.search(r"^#\s+(.+)$", markdown, re.MULTILINE)
+
+def extract_title(markdown: str | Iterable[str]) -> str:
+    """Return the first H1 of markdown, given as a string or as lines."""
+    if isinstance(markdown, str):
+        match = TITLE_RE.search(markdown)
+    else:
+        match = next(filter(None, map(TITLE_RE.match, markdown)), None)
     if not match:
         raise ValueError("No H1 title found")
     return match.group(1).strip()
@@ -18,93 +55,591 @@ def extract_title(markdown: str) -> str:
 logger = logging.getLogger(__name__)
 
 
-def copy_recursive(src: Path, dest: Path):
-    logger.info(f"copying {src.absolute()}")
-
-    if dest.exists() and dest.is_dir():
-        shutil.rmtree(dest)
+class PageBuildError(Exception):
+    pass
 
-    dest.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Creating dir {dest.absolute()}")
 
-    for item in src.iterdir():
-        if item.is_dir():
-            copy_recursive(item, dest / item.name)
-        else:
-            logger.info(f"Copying {item.absolute()} to {(dest / item.name).absolute()}")
-            shutil.copy(item, dest / item.name)
+def write_page(
+    out: TextIO,
+    markdown: str,
+    template: Template,
+    basepath: str,
+    block_memo: BlockMemo | None = None,
+) -> None:
+    node = markdown_to_html_node(markdown, basepath, block_memo)
+    title = extract_title(markdown)
+    template.write(out, {"Title": title, "Content": node})
 
 
 def generate_page(
     from_path: Path,
-    template_path: Path,
+    template: Template,
     dest_path: Path,
     basepath: str,
+    stream_threshold: int = STREAM_THRESHOLD,
+    tracer: Tracer | None = None,
+    parse_cache: ParseCache | None = None,
+    block_memo: BlockMemo | None = None,
 ):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    print(f"Generating page from {from_path} to {dest_path} using {template.path}")
 
-    markdown = from_path.read_text()
-    template = template_path.read_text()
+    # Stream into a sibling file and rename it over the destination, so a
+    # render error never leaves a half-written page behind.
+    tmp_path = dest_path.with_name(dest_path.name + ".tmp")
+    page = from_path.as_posix()
+    try:
+        with tmp_path.open("w") as f:
+            if from_path.stat().st_size > stream_threshold:
+                # Find the title in a first pass over the lines, then parse and
+                # write one block at a time: memory is bounded by the largest
+                # block instead of by the document.
+                with span(tracer, "read", page=page), from_path.open() as source:
+                    title = extract_title(source)
+                with span(tracer, "parse+render", page=page), from_path.open() as source:
+                    node = markdown_to_html_stream(source, basepath, block_memo)
+                    template.write(f, {"Title": title, "Content": node})
+            else:
+                with span(tracer, "read", page=page):
+                    markdown = from_path.read_text()
+                with span(tracer, "parse", page=page):
+                    if parse_cache is not None:
+                        node = parse_cache.parse(markdown, basepath, block_memo)
+                    else:
+                        node = markdown_to_html_node(markdown, basepath, block_memo)
+                    title = extract_title(markdown)
+                with span(tracer, "render", page=page):
+                    template.write(f, {"Title": title, "Content": node})
+            with span(tracer, "write", page=page):
+                f.flush()
+                os.replace(tmp_path, dest_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
-    html = markdown_to_html_node(markdown).to_html()
-    title = extract_title(markdown)
 
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
+def build_page(
+    page: Tuple[Path, Path],
+    template: Template,
+    basepath: str,
+    stream_threshold: int = STREAM_THRESHOLD,
+    profile: bool = False,
+    trace: bool = False,
+    parse_cache: ParseCache | None = None,
+    block_memo: BlockMemo | None = None,
+    inline_memo: int = 0,
+) -> Dict:
+    """
+    Generate one page, naming the source file in any error it raises.
+
+    The template is expected to have had basepath applied already. Returns
+    the page's stage timings under "profile" with profile, and its trace
+    events under "trace" with trace. Small pages are parsed through
+    parse_cache when one is given, and blocks through block_memo. With
+    inline_memo, this process memoizes that many runs of inline text, and
+    the page's hits and misses are returned under "inline_memo".
+    """
+    source, dest = page
+    report: Dict = {}
+    tracer = Tracer() if trace else None
+    generate = partial(
+        generate_page,
+        source,
+        template,
+        dest,
+        basepath,
+        stream_threshold,
+        tracer,
+        parse_cache,
+        block_memo,
+    )
+    memo = use_inline_memo(inline_memo) if inline_memo else None
+    before = memo.stats() if memo is not None else (0, 0)
+    try:
+        with span(tracer, "page", "page", page=source.as_posix()):
+            if profile:
+                with profile_page() as timer:
+                    generate()
+                report["profile"] = page_record(source, timer)
+            else:
+                generate()
+    except Exception as e:
+        raise PageBuildError(f"Failed to generate {source}: {e!r}") from e
+    if tracer is not None:
+        report["trace"] = tracer.events
+    if memo is not None:
+        hits, misses = memo.stats()
+        report["inline_memo"] = (hits - before[0], misses - before[1])
+    return report
+
 
-    # Apply basepath to absolute links
-    template = template.replace('href="/', f'href="{basepath}')
-    template = template.replace('src="/', f'src="{basepath}')
+def build_pages(
+    pages: List[Tuple[Path, Path]],
+    template: Template,
+    basepath: str,
+    jobs: int = 1,
+    stream_threshold: int = STREAM_THRESHOLD,
+    profile: bool = False,
+    trace: bool = False,
+    parse_cache: ParseCache | None = None,
+    block_memo: BlockMemo | None = None,
+    inline_memo: int = 0,
+) -> List[Dict]:
+    """
+    Generate pages serially, or across a pool of worker processes when jobs > 1.
+
+    Workers run exactly the same build_page as the serial path, so the output
+    does not depend on the number of jobs. Returns what build_page returned
+    for every page.
+    """
+    build = partial(
+        build_page,
+        template=template,
+        basepath=basepath,
+        stream_threshold=stream_threshold,
+        profile=profile,
+        trace=trace,
+        parse_cache=parse_cache,
+        block_memo=block_memo,
+        inline_memo=inline_memo,
+    )
+    if jobs <= 1 or len(pages) <= 1:
+        return list(map(build, pages))
 
-    dest_path.write_text(template)
+    workers = min(jobs, len(pages))
+    # Hand out a few chunks per worker to amortise the pickling round-trip
+    # while still evening out pages of very different sizes.
+    chunksize = max(1, len(pages) // (workers * 4))
+    # Not fork: the asset-copy threads may be running, and forking a process
+    # with live threads can deadlock the child.
+    context = get_context("forkserver")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        return list(pool.map(build, pages, chunksize=chunksize))
+
+
+def collect_pages(dir_path_content: Path, dest_dir_path: Path) -> List[Tuple[Path, Path]]:
+    pages: List[Tuple[Path, Path]] = []
+    for entry in sorted(dir_path_content.iterdir()):
+        if entry.is_dir():
+            pages.extend(collect_pages(entry, dest_dir_path / entry.name))
+        elif entry.suffix == ".md":
+            pages.append((entry, dest_dir_path / (entry.stem + ".html")))
+    return pages
 
 
-def generate_page_recursively(
+def generate_pages_incrementally(
     dir_path_content: Path,
     template_path: Path,
     dest_dir_path: Path,
     basepath: str,
+    manifest_path: Path,
+    force: bool = False,
+    jobs: int = 1,
+    stream_threshold: int = STREAM_THRESHOLD,
+    previous: BuildManifest | None = None,
+    save_manifest: bool = True,
+    profile: BuildProfile | None = None,
+    tracer: Tracer | None = None,
+    parse_cache: ParseCache | None = None,
+    block_memo: BlockMemo | None = None,
+    inline_memo: int = 0,
+    remove_stale: bool = True,
+) -> BuildManifest:
+    """
+    Regenerate only the pages whose source, template or basepath changed.
+
+    Pages that disappeared from the content directory since the last build have
+    their outputs removed. The manifest is only written once every page has been
+    generated, so a failed build is retried in full on the next run.
+
+    previous is the manifest to compare against when the caller has already
+    loaded it. Without save_manifest the new manifest is only returned, for a
+    caller that has more to do before the build counts as done. With profile,
+    the stage timings of every generated page are added to it, and with
+    tracer, their trace events. With inline_memo, the memo's hit rate over
+    the generated pages is logged. Without remove_stale, deleting the outputs
+    of removed pages is left to the caller.
+    """
+    if previous is None:
+        previous = BuildManifest() if force else BuildManifest.load(manifest_path)
+    template_hash = file_digest(template_path)
+    current = BuildManifest(template_hash, basepath, assets=previous.assets)
+    rebuild_all = not previous.same_settings(template_hash, basepath)
+
+    stale: List[Tuple[Path, Path]] = []
+    for source, dest in collect_pages(dir_path_content, dest_dir_path):
+        st, digest = previous.source_digest(source)
+        if rebuild_all or not previous.is_fresh(source, dest, digest, dest_dir_path):
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            stale.append((source, dest))
+        current.record(source, dest, st, digest, dest_dir_path)
+
+    if stale:
+        # Compile the template once per build; workers receive it pickled
+        # instead of re-reading template.html for every page.
+        template = Template.from_path(template_path).with_basepath(basepath)
+        template.validate(PAGE_PLACEHOLDERS)
+        reports = build_pages(
+            stale,
+            template,
+            basepath,
+            jobs,
+            stream_threshold,
+            profile=profile is not None,
+            trace=tracer is not None,
+            parse_cache=parse_cache,
+            block_memo=block_memo,
+            inline_memo=inline_memo,
+        )
+        for report in reports:
+            if profile is not None:
+                profile.pages.append(report["profile"])
+            if tracer is not None:
+                tracer.events.extend(report["trace"])
+        if inline_memo:
+            hits = sum(report["inline_memo"][0] for report in reports)
+            lookups = hits + sum(report["inline_memo"][1] for report in reports)
+            rate = hits / lookups * 100 if lookups else 0
+            logger.info(f"Inline memo: {hits}/{lookups} runs of inline text hit ({rate:.0f}%)")
+    generated = len(stale)
+
+    removed = 0
+    if remove_stale:
+        for key, entry in previous.pages.items():
+            if key not in current.pages:
+                remove_output(dest_dir_path / entry["output"], dest_dir_path)
+                removed += 1
+
+    if save_manifest:
+        current.save(manifest_path)
+    logger.info(
+        f"Generated {generated} pages, "
+        f"skipped {len(current.pages) - generated}, removed {removed}"
+    )
+    return current
+
+
+def remove_stale_outputs(previous: BuildManifest, current: BuildManifest, root: Path) -> int:
+    """Delete the outputs of pages and assets built last time but not this time."""
+    stale = [
+        root / entry["output"]
+        for key, entry in previous.pages.items()
+        if key not in current.pages
+    ]
+    assets = set(current.assets)
+    stale.extend(root / rel for rel in previous.assets if rel not in assets)
+    for path in stale:
+        remove_output(path, root)
+    if stale:
+        logger.info(f"Removed {len(stale)} stale outputs")
+    return len(stale)
+
+
+def build_site(
+    content: Path,
+    static: Path,
+    template_path: Path,
+    public: Path,
+    basepath: str,
+    manifest_path: Path,
+    force: bool = False,
+    jobs: int = 1,
+    stream_threshold: int = STREAM_THRESHOLD,
+    hash_assets: bool = False,
+    link_assets: bool = False,
+    copy_workers: int = COPY_WORKERS,
+    profile: BuildProfile | None = None,
+    tracer: Tracer | None = None,
+    parse_cache: ParseCache | None = None,
+    block_memo: BlockMemo | None = None,
+    inline_memo: int = 0,
 ):
-    dest_dir_path.mkdir(parents=True, exist_ok=True)
+    """
+    Sync static assets and regenerate stale pages at the same time.
 
-    for entry in dir_path_content.iterdir():
-        if entry.is_dir():
-            generate_page_recursively(
-                entry,
-                template_path,
-                dest_dir_path / entry.name,
-                basepath,
+    Asset copying is I/O-bound, so it runs on a thread pool in the background
+    while pages are parsed and written; the build waits for both.
+
+    The build goes into a staging copy of public that is swapped in only once
+    it is complete, so public is never half-written and a failed build leaves
+    it untouched. The manifest is saved after the swap, so it never describes
+    outputs that were not published.
+
+    With profile, the wall time of each phase and the stage timings of every
+    generated page are recorded in it. With tracer, every phase, page step and
+    asset copy is recorded as a span. With parse_cache, pages are parsed
+    through it, and it is trimmed to its size bound once the build is published.
+    """
+    start = time.perf_counter()
+
+    @contextmanager
+    def phase(name: str) -> Iterator[None]:
+        timed = profile.phase(name) if profile is not None else nullcontext()
+        with span(tracer, name), timed:
+            yield
+
+    previous = BuildManifest() if force else BuildManifest.load(manifest_path)
+    with phase("staging"):
+        staging = stage_output(public, reuse=not force)
+
+    def sync_assets() -> SyncStats:
+        with phase("assets"):
+            return sync_tree(
+                static,
+                staging,
+                previous.assets,
+                hash_assets,
+                link_assets,
+                copy_workers,
+                tracer,
+                remove_stale=False,
             )
-        elif entry.suffix == ".md":
-            generate_page(
-                entry,
+
+    try:
+        with ThreadPoolExecutor(max_workers=1) as background, phase("pages"):
+            synced = background.submit(sync_assets)
+            current = generate_pages_incrementally(
+                content,
                 template_path,
-                dest_dir_path / (entry.stem + ".html"),
+                staging,
                 basepath,
+                manifest_path,
+                force=force,
+                jobs=jobs,
+                stream_threshold=stream_threshold,
+                previous=previous,
+                save_manifest=False,
+                profile=profile,
+                tracer=tracer,
+                parse_cache=parse_cache,
+                block_memo=block_memo,
+                inline_memo=inline_memo,
+                remove_stale=False,
             )
+            current.assets = synced.result().files
+        # Only delete stale outputs once nothing else writes to staging:
+        # removing one also removes the directories it leaves empty, which a
+        # page or asset may be about to be written into.
+        remove_stale_outputs(previous, current, staging)
+    except BaseException:
+        discard_staging(public)
+        raise
+    with phase("publish"):
+        publish_output(staging, public)
+        current.save(manifest_path)
+    if parse_cache is not None:
+        with phase("evict"):
+            parse_cache.evict()
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"Built {public} in {elapsed:.0f} ms")
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the site into docs/")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="ignore the build manifest and rebuild everything from scratch",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="generate pages in N worker processes (0 uses every CPU core)",
+    )
+    parser.add_argument(
+        "--stream-threshold",
+        type=int,
+        default=STREAM_THRESHOLD,
+        metavar="BYTES",
+        help="convert sources larger than BYTES block by block to bound memory use",
+    )
+    parser.add_argument(
+        "--hash-assets",
+        action="store_true",
+        help="compare same-sized static files by content when their mtimes differ",
+    )
+    parser.add_argument(
+        "--link-assets",
+        action="store_true",
+        help="hardlink static files into docs/ instead of copying them",
+    )
+    parser.add_argument(
+        "--parse-cache",
+        action="store_true",
+        help=(
+            f"cache parsed pages in {CACHE_PATH}, so rebuilds after a template edit "
+            "or with --force skip parsing (slows down a cold build)"
+        ),
+    )
+    parser.add_argument(
+        "--parse-cache-size",
+        type=int,
+        default=CACHE_SIZE // (1024 * 1024),
+        metavar="MB",
+        help="with --parse-cache, evict the least recently used trees beyond MB megabytes",
+    )
+    parser.add_argument(
+        "--block-memo-size",
+        type=int,
+        default=BLOCK_MEMO_SIZE // (1024 * 1024),
+        metavar="MB",
+        help="with --watch or --serve, keep up to MB of rendered blocks in memory (0 disables)",
+    )
+    parser.add_argument(
+        "--inline-memo",
+        nargs="?",
+        const=INLINE_MEMO_ENTRIES,
+        default=0,
+        type=int,
+        metavar="N",
+        help=(
+            "reuse the parsed inline text of up to N repeated runs, such as table cells, "
+            f"and log the hit rate (default N {INLINE_MEMO_ENTRIES})"
+        ),
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and rebuild pages and assets as their sources change",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="render pages on request in a dev server instead of building docs/",
+    )
+    parser.add_argument("--port", type=int, default=8888, help="port for --serve")
+    parser.add_argument(
+        "--no-live-reload",
+        action="store_true",
+        help="with --serve, do not reload open pages when their sources change",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=PROFILE_PATH,
+        type=Path,
+        metavar="PATH",
+        help=f"time every build stage and page and write a JSON report (default {PROFILE_PATH})",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="list the N slowest pages in the --profile report",
+    )
+    parser.add_argument(
+        "--cprofile",
+        type=Path,
+        metavar="PATH",
+        help="dump cProfile stats of the whole build to PATH (builds in one process)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="PATH",
+        help="write a Chrome trace of the build's pages and asset copies to PATH",
+    )
+    return parser.parse_args(argv)
 
 
-def main():
+def main(argv: List[str] | None = None):
     logging.basicConfig(level=logging.INFO)
 
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+    args = parse_args(argv)
+    basepath = args.basepath
     if not basepath.endswith("/"):
         basepath += "/"
 
-    public = Path("docs")
-    if public.exists():
-        shutil.rmtree(public)
-    public.mkdir()
+    block_memo = BlockMemo(args.block_memo_size * 1024 * 1024) if args.block_memo_size else None
+
+    # For the dev server and watch mode, which parse in this process.
+    use_inline_memo(args.inline_memo)
 
-    copy_recursive(Path("static"), public)
+    if args.serve:
+        # Imported here: the server builds on this module's functions.
+        from server import DevSite, serve
 
-    generate_page_recursively(
+        serve(
+            DevSite(
+                Path("content"),
+                Path("static"),
+                Path("template.html"),
+                basepath,
+                live_reload=not args.no_live_reload,
+                block_memo=block_memo,
+            ),
+            port=args.port,
+        )
+        return
+
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    profile = BuildProfile(args.profile_top) if args.profile else None
+    tracer = Tracer() if args.trace else None
+    parse_cache = (
+        ParseCache(CACHE_PATH, args.parse_cache_size * 1024 * 1024)
+        if args.parse_cache
+        else None
+    )
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler is not None:
+        # cProfile only sees this process, so keep the pages in it too.
+        jobs = 1
+        profiler.enable()
+
+    public = Path("docs")
+    build_site(
         Path("content"),
+        Path("static"),
         Path("template.html"),
         public,
         basepath,
+        MANIFEST_PATH,
+        force=args.force,
+        jobs=jobs,
+        stream_threshold=args.stream_threshold,
+        hash_assets=args.hash_assets,
+        link_assets=args.link_assets,
+        profile=profile,
+        tracer=tracer,
+        parse_cache=parse_cache,
+        # Filling the memo costs a one-off build more than it saves; a
+        # watched build warms it for the rebuilds that follow.
+        block_memo=block_memo if args.watch else None,
+        inline_memo=args.inline_memo,
     )
 
+    if block_memo is not None and block_memo.hits + block_memo.misses:
+        logger.info(f"Block memo: {block_memo.stats()}")
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.cprofile)
+        logger.info(f"Wrote cProfile stats to {args.cprofile}; view with python3 -m pstats")
+    if profile is not None:
+        print(format_report(profile.write(args.profile)))
+        logger.info(f"Wrote profile to {args.profile}")
+    if tracer is not None:
+        tracer.write(args.trace)
+        logger.info(f"Wrote trace to {args.trace}; open it in Perfetto or chrome://tracing")
+
+    if args.watch:
+        # Imported here: watch builds on this module's functions.
+        from watch import SiteWatcher
+
+        SiteWatcher(
+            Path("content"),
+            Path("static"),
+            Path("template.html"),
+            public,
+            basepath,
+            MANIFEST_PATH,
+            stream_threshold=args.stream_threshold,
+            parse_cache=parse_cache,
+            block_memo=block_memo,
+        ).run()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+MANIFEST_VERSION = 2
+
+
+def file_digest(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def output_name(dest: Path, root: Path | None) -> str:
+    # Outputs are recorded relative to the output root when one is given, so
+    # the manifest stays valid whichever directory the site is built into.
+    return (dest.relative_to(root) if root is not None else dest).as_posix()
+
+
+class BuildManifest:
+    """
+    Record of the inputs that produced each generated page.
+
+    Every page entry stores the source's mtime, size and content hash together
+    with the output it was rendered to, relative to the output root. The
+    template hash and basepath apply to the whole site: when either changes,
+    every page is stale. assets lists the static files copied into the output,
+    so removed ones can be deleted.
+    """
+
+    def __init__(
+        self,
+        template_hash: str = "",
+        basepath: str = "",
+        pages: Dict[str, Dict] | None = None,
+        assets: List[str] | None = None,
+    ) -> None:
+        self.template_hash: str = template_hash
+        self.basepath: str = basepath
+        self.pages: Dict[str, Dict] = pages if pages is not None else {}
+        self.assets: List[str] = assets if assets is not None else []
+
+    @classmethod
+    def load(cls, path: Path) -> "BuildManifest":
+        """Read a manifest, falling back to an empty one if it is missing or unusable."""
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls()
+        return cls(data["template"], data["basepath"], data["pages"], data.get("assets"))
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "template": self.template_hash,
+            "basepath": self.basepath,
+            "pages": self.pages,
+            "assets": self.assets,
+        }
+        # Write to a sibling and rename so an interrupted build never leaves
+        # a truncated manifest behind.
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=1, sort_keys=True))
+        os.replace(tmp, path)
+
+    def same_settings(self, template_hash: str, basepath: str) -> bool:
+        return self.template_hash == template_hash and self.basepath == basepath
+
+    def source_digest(self, source: Path) -> Tuple[os.stat_result, str]:
+        """
+        Hash a source file, reusing the recorded hash when mtime and size are unchanged.
+        """
+        st = source.stat()
+        entry = self.pages.get(source.as_posix())
+        if (
+            entry is not None
+            and entry["mtime_ns"] == st.st_mtime_ns
+            and entry["size"] == st.st_size
+        ):
+            return st, entry["hash"]
+        return st, file_digest(source)
+
+    def is_fresh(
+        self, source: Path, dest: Path, digest: str, root: Path | None = None
+    ) -> bool:
+        entry = self.pages.get(source.as_posix())
+        return (
+            entry is not None
+            and entry["hash"] == digest
+            and entry["output"] == output_name(dest, root)
+            and dest.exists()
+        )
+
+    def record(
+        self,
+        source: Path,
+        dest: Path,
+        st: os.stat_result,
+        digest: str,
+        root: Path | None = None,
+    ) -> None:
+        self.pages[source.as_posix()] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "hash": digest,
+            "output": output_name(dest, root),
+        }
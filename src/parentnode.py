@@ -1,18 +1,18 @@
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from htmlnode import HTMLNode
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self, tag: str, children: List[HTMLNode], props: Dict[str, str] | None = None
     ) -> None:
         super().__init__(tag, None, children, props)
 
-    def to_html(self) -> str:
+    def html_parts(self) -> Tuple[str, str]:
         if not self.tag:
             raise ValueError("None tag for parent node")
         if not self.children:
             raise ValueError("None children tag for parent node")
-        props_html = self.props_to_html()
-        children_html = "".join([child.to_html() for child in self.children])
-        return f"<{self.tag}{props_html}>{children_html}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>", f"</{self.tag}>"
@@ -0,0 +1,152 @@
+"""
+On-disk cache of parsed Markdown.
+
+A page is often regenerated although its Markdown did not change: after an
+edit to the template or in a --force build. The cache maps a hash of the
+Markdown, the basepath and the parser's own source code to the HTMLNode tree
+markdown_to_html_node produced, serialized with marshal, so those rebuilds
+skip parsing. A build with another basepath, or after any edit to the
+parser, misses on every page; stale trees are never served, they are simply
+evicted in time. Storing the trees makes a cold build slower, so the cache
+is only used with --parse-cache.
+
+Entries are written to a temporary file and renamed into place, so worker
+processes sharing the cache never read a partial entry, and two workers
+caching the same page write identical bytes. A hit bumps the entry's mtime,
+and evict() deletes the least recently used entries beyond the size bound.
+"""
+from functools import lru_cache
+import hashlib
+import logging
+import marshal
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+from block import markdown_to_html_node
+from blockmemo import BlockMemo
+from htmlnode import HTMLNode
+from leafnode import LeafNode
+from parentnode import ParentNode
+
+CACHE_PATH = Path(".loom") / "parse-cache"
+CACHE_SIZE = 128 * 1024 * 1024
+# Bump when the serialized form below changes.
+CACHE_FORMAT = 1
+PARSER_MODULES = ("block", "inline", "textnode", "htmlnode", "leafnode", "parentnode")
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def parser_version() -> str:
+    """Digest of the cache format and the source of every module that shapes a tree."""
+    digest = hashlib.sha256(f"format {CACHE_FORMAT}".encode())
+    for name in PARSER_MODULES:
+        digest.update(Path(__file__).with_name(f"{name}.py").read_bytes())
+    return digest.hexdigest()
+
+
+# A node is stored as nested builtins that marshal can write: a plain text
+# leaf as its string, any other leaf as (tag, value, props) and a parent as
+# (tag, props, [children]). Trees are only as deep as blocks nest inline
+# markup, well within marshal's recursion limit.
+def encode_node(node: HTMLNode) -> str | tuple:
+    if node.children is None:
+        if node.tag is None and not node.props:
+            return node.value
+        return (node.tag, node.value, node.props)
+    return (node.tag, node.props, [encode_node(child) for child in node.children])
+
+
+def decode_node(data: str | tuple) -> HTMLNode:
+    if isinstance(data, str):
+        return LeafNode(None, data)
+    tag, second, third = data
+    if isinstance(third, list):
+        return ParentNode(tag, [decode_node(child) for child in third], second)
+    return LeafNode(tag, second, third)
+
+
+class ParseCache:
+    def __init__(self, root: Path = CACHE_PATH, max_bytes: int = CACHE_SIZE) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def entry_path(self, markdown: str, basepath: str) -> Path:
+        digest = hashlib.sha256(parser_version().encode())
+        digest.update(basepath.encode() + b"\0")
+        digest.update(markdown.encode())
+        key = digest.hexdigest()
+        return self.root / key[:2] / key[2:]
+
+    def load(self, path: Path) -> HTMLNode | None:
+        try:
+            data = path.read_bytes()
+            node = decode_node(marshal.loads(data))
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable parse cache entry {path}: {e!r}")
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # Evicted by another build in the meantime; the tree is still good.
+            pass
+        return node
+
+    def store(self, path: Path, node: HTMLNode) -> None:
+        data = marshal.dumps(encode_node(node))
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            try:
+                tmp.write_bytes(data)
+            except FileNotFoundError:
+                # Create the shard on first use only; mkdir is not free.
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp.write_bytes(data)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def parse(
+        self, markdown: str, basepath: str = "/", memo: BlockMemo | None = None
+    ) -> HTMLNode:
+        """markdown_to_html_node, served from the cache when possible."""
+        path = self.entry_path(markdown, basepath)
+        node = self.load(path)
+        if node is None:
+            node = markdown_to_html_node(markdown, basepath, memo)
+            self.store(path, node)
+        return node
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits max_bytes; return how many."""
+        entries: List[Tuple[int, int, str]] = []
+        total = 0
+        if not self.root.is_dir():
+            return 0
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                total += st.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} parse cache entries")
+        return removed
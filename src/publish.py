@@ -0,0 +1,118 @@
+"""
+Atomic publishing of the output directory.
+
+A build is written into a staging directory next to the output and swapped
+into place once it is complete, so whatever serves docs/ only ever sees the
+previous build or the new one, never a half-written tree. The staging
+directory starts as a hardlinked clone of the current output: unchanged pages
+and assets cost one link each, and since pages and assets are always written
+to a temporary file and renamed, rebuilding one replaces the link instead of
+writing through it into the live tree.
+
+If the output is a symlink, the build is published by pointing a new symlink
+at it and renaming that over the old one, which is a single atomic step.
+Otherwise the staged directory and the output are exchanged with Linux's
+renameat2(RENAME_EXCHANGE), also a single step. Where that is unavailable
+(other platforms, old kernels, some filesystems), the old directory is
+renamed aside and the staged one renamed into its place, and between those
+two renames the output is missing.
+"""
+import ctypes
+import errno
+import logging
+import os
+from pathlib import Path
+import shutil
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+
+
+def load_renameat2() -> Callable[..., int] | None:
+    try:
+        return ctypes.CDLL(None, use_errno=True).renameat2
+    except (AttributeError, OSError, TypeError):
+        # Not glibc 2.28+, or not Linux at all.
+        return None
+
+
+renameat2 = load_renameat2()
+
+
+def staging_path(public: Path) -> Path:
+    return public.with_name(f".{public.name}.staging")
+
+
+def link_or_copy(src: str, dest: str) -> None:
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+def stage_output(public: Path, reuse: bool = True) -> Path:
+    """
+    Create an empty staging directory for public and return it.
+
+    With reuse, it is filled with hardlinks to every file currently in public.
+    A staging directory left behind by an interrupted build is discarded.
+    """
+    staging = staging_path(public)
+    shutil.rmtree(staging, ignore_errors=True)
+    if reuse and public.is_dir():
+        shutil.copytree(public, staging, symlinks=True, copy_function=link_or_copy)
+    else:
+        staging.mkdir(parents=True)
+    return staging
+
+
+def discard_staging(public: Path) -> None:
+    shutil.rmtree(staging_path(public), ignore_errors=True)
+
+
+def exchange_dirs(a: Path, b: Path) -> bool:
+    """
+    Atomically swap the paths a and b, which must both exist. Return False,
+    changing nothing, if the platform or filesystem cannot.
+    """
+    if renameat2 is None:
+        return False
+    if renameat2(AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.EINVAL, errno.ENOSYS, errno.ENOTSUP):
+        return False
+    raise OSError(err, os.strerror(err), str(a), None, str(b))
+
+
+def publish_output(staging: Path, public: Path) -> None:
+    """Swap the staged build into place as public and delete the one it replaces."""
+    start = time.perf_counter()
+    prefix = f".{public.name}."
+    if public.is_symlink():
+        old = public.parent / os.readlink(public)
+        release = public.with_name(f"{prefix}{time.time_ns()}")
+        os.rename(staging, release)
+        link = public.with_name(f"{prefix}link")
+        link.unlink(missing_ok=True)
+        os.symlink(release.name, link)
+        os.replace(link, public)
+        # Only remove releases this module created, never a directory the
+        # symlink was pointed at by hand.
+        if old.parent == public.parent and old.name.startswith(prefix):
+            shutil.rmtree(old, ignore_errors=True)
+    elif public.exists() and exchange_dirs(staging, public):
+        shutil.rmtree(staging, ignore_errors=True)
+    else:
+        old = public.with_name(f"{prefix}old")
+        shutil.rmtree(old, ignore_errors=True)
+        if public.exists():
+            os.rename(public, old)
+        os.rename(staging, public)
+        shutil.rmtree(old, ignore_errors=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"Published {public} in {elapsed:.0f} ms")
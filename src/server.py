@@ -0,0 +1,361 @@
+"""
+Development server that renders pages on request instead of building docs/.
+
+A page is rendered the first time it is requested and kept in memory until
+its source or the template changes. Responses carry an ETag, so a browser
+revalidating an unchanged page or asset gets an empty 304.
+
+With live reload, every page subscribes to a Server-Sent Events stream and
+is told to reload only when its own source, the template or a static file
+changes.
+"""
+from functools import partial
+import hashlib
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import logging
+import mimetypes
+from pathlib import Path, PurePosixPath
+import queue
+import shutil
+import threading
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from blockmemo import BlockMemo
+from main import PAGE_PLACEHOLDERS, write_page
+from template import Template
+from watch import POLL_INTERVAL, diff_snapshots, take_snapshot
+
+logger = logging.getLogger(__name__)
+
+# (mtime_ns, size) of a file, used to notice edits without reading it.
+Stamp = Tuple[int, int]
+
+LIVE_RELOAD_PATH = "__livereload"
+LIVE_RELOAD_SCRIPT = (
+    "<script>new EventSource(\"{url}?path=\" + encodeURIComponent(location.pathname))"
+    ".onmessage = () => location.reload();</script>"
+)
+# Idle SSE connections get a comment this often, so closed tabs are noticed.
+KEEPALIVE_INTERVAL = 15
+
+
+def file_stamp(path: Path) -> Stamp | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def file_within(root: Path, path: Path) -> Path | None:
+    """path if it is a file that does not resolve to outside root."""
+    if not path.is_file() or not path.resolve().is_relative_to(root.resolve()):
+        return None
+    return path
+
+
+class CachedPage:
+    __slots__ = ("stamp", "template_stamp", "body", "etag")
+
+    def __init__(self, stamp: Stamp, template_stamp: Stamp, body: bytes) -> None:
+        self.stamp = stamp
+        self.template_stamp = template_stamp
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+class DevSite:
+    """
+    Maps request paths to content pages and static files, rendering pages lazily.
+
+    URLs follow the layout of a built docs/: /blog/tom/ is content/blog/tom/index.md
+    and /contact.html (or /contact) is content/contact.md.
+    """
+
+    def __init__(
+        self,
+        content: Path,
+        static: Path,
+        template_path: Path,
+        basepath: str = "/",
+        live_reload: bool = False,
+        block_memo: BlockMemo | None = None,
+    ) -> None:
+        self.content = content
+        self.static = static
+        self.template_path = template_path
+        self.basepath = basepath
+        self.live_reload = live_reload
+        self.block_memo = block_memo
+        self.pages: Dict[Path, CachedPage] = {}
+        self.lock = threading.Lock()
+        self.template: Template | None = None
+        self.template_stamp: Stamp | None = None
+
+    def current_template(self) -> Tuple[Template, Stamp]:
+        stamp = file_stamp(self.template_path)
+        if stamp is None:
+            raise FileNotFoundError(self.template_path)
+        with self.lock:
+            if self.template is None or stamp != self.template_stamp:
+                template = Template.from_path(self.template_path)
+                template = template.with_basepath(self.basepath)
+                template.validate(PAGE_PLACEHOLDERS)
+                if self.live_reload:
+                    url = self.basepath + LIVE_RELOAD_PATH
+                    template = template.with_markup(LIVE_RELOAD_SCRIPT.format(url=url))
+                self.template, self.template_stamp = template, stamp
+            return self.template, stamp
+
+    def watched(self) -> List[Path]:
+        return [self.content, self.static, self.template_path]
+
+    def resolve(self, url_path: str) -> Tuple[str, Path | str] | None:
+        """
+        Return ("page", source), ("static", file) or ("redirect", location) for a
+        request path, or None if nothing is there.
+        """
+        if not url_path.startswith(self.basepath):
+            return ("redirect", self.basepath) if url_path == "/" else None
+        rel = PurePosixPath(url_path[len(self.basepath) :])
+        # "//etc/passwd" or "/%2Fetc/passwd" leave an absolute remainder,
+        # which would replace the root it is joined to.
+        if rel.is_absolute() or ".." in rel.parts:
+            return None
+        name = rel.as_posix() if rel.parts else ""
+
+        if url_path.endswith("/"):
+            source = file_within(self.content, self.content / name / "index.md")
+            return ("page", source) if source else None
+        if name.endswith(".html"):
+            source = file_within(self.content, self.content / (name[: -len(".html")] + ".md"))
+            return ("page", source) if source else None
+
+        asset = file_within(self.static, self.static / name)
+        if asset:
+            return ("static", asset)
+        if file_within(self.content, self.content / name / "index.md"):
+            return ("redirect", url_path + "/")
+        source = file_within(self.content, self.content / (name + ".md"))
+        if source:
+            return ("page", source)
+        return None
+
+    def render(self, source: Path) -> CachedPage:
+        """Return the rendered page, reusing the cached copy while its inputs are unchanged."""
+        template, template_stamp = self.current_template()
+        stamp = file_stamp(source)
+        if stamp is None:
+            raise FileNotFoundError(source)
+        with self.lock:
+            page = self.pages.get(source)
+        if page is not None and page.stamp == stamp and page.template_stamp == template_stamp:
+            return page
+
+        out = io.StringIO()
+        write_page(out, source.read_text(), template, self.basepath, self.block_memo)
+        page = CachedPage(stamp, template_stamp, out.getvalue().encode())
+        with self.lock:
+            self.pages[source] = page
+        logger.info(f"Rendered {source}")
+        return page
+
+
+class LiveReload:
+    """
+    Polls the site's sources and tells each subscribed page when to reload.
+
+    Every open tab subscribes with the source of the page it shows. A changed
+    page source only reaches the tabs showing that page; a changed template
+    or static file reaches every tab.
+    """
+
+    def __init__(self, site: DevSite) -> None:
+        self.site = site
+        self.clients: Dict[queue.Queue, Path | None] = {}
+        self.lock = threading.Lock()
+        self.snapshot = take_snapshot(site.watched())
+        self.stopped = threading.Event()
+
+    def subscribe(self, source: Path | None) -> queue.Queue:
+        events: queue.Queue = queue.Queue()
+        with self.lock:
+            self.clients[events] = source
+        return events
+
+    def unsubscribe(self, events: queue.Queue) -> None:
+        with self.lock:
+            self.clients.pop(events, None)
+
+    def poll(self) -> int:
+        """Notify the tabs affected by changes since the last poll; return how many."""
+        snapshot = take_snapshot(self.site.watched())
+        changed, removed = diff_snapshots(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        changed |= removed
+        if not changed:
+            return 0
+        reload_all = any(not Path(path).is_relative_to(self.site.content) for path in changed)
+        with self.lock:
+            affected = [
+                events
+                for events, source in self.clients.items()
+                if reload_all or str(source) in changed
+            ]
+        for events in affected:
+            events.put("reload")
+        return len(affected)
+
+    def run(self, interval: float = POLL_INTERVAL) -> None:
+        while not self.stopped.wait(interval):
+            # This runs on a daemon thread, where an exception would end live
+            # reload for the rest of the session without a word.
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Live reload poll failed; still polling")
+
+    def close(self) -> None:
+        """Stop polling and end every open event stream."""
+        self.stopped.set()
+        with self.lock:
+            for events in self.clients:
+                events.put(None)
+
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    def __init__(
+        self, *args, site: DevSite, live: LiveReload | None = None, **kwargs
+    ) -> None:
+        self.site = site
+        self.live = live
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if self.live is not None and unquote(url.path) == self.site.basepath + LIVE_RELOAD_PATH:
+            page = parse_qs(url.query).get("path", [""])[0]
+            self.stream_events(self.live, page)
+            return
+        self.respond(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self.respond(send_body=False)
+
+    def respond(self, send_body: bool) -> None:
+        resolved = self.site.resolve(unquote(urlsplit(self.path).path))
+        if resolved is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        kind, target = resolved
+        if kind == "redirect":
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header("Location", str(target))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        assert isinstance(target, Path)
+        if kind == "page":
+            try:
+                page = self.site.render(target)
+            except Exception as e:
+                logger.error(f"Failed to render {target}: {e!r}")
+                self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, explain=repr(e))
+                return
+            if self.not_modified(page.etag):
+                return
+            self.send_headers("text/html; charset=utf-8", len(page.body), page.etag)
+            if send_body:
+                self.wfile.write(page.body)
+            return
+
+        stamp = file_stamp(target)
+        if stamp is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        etag = f'"{stamp[0]:x}-{stamp[1]:x}"'
+        if self.not_modified(etag):
+            return
+        content_type = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+        self.send_headers(content_type, stamp[1], etag)
+        if send_body:
+            with target.open("rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+
+    def stream_events(self, live: LiveReload, page: str) -> None:
+        # The script sends location.pathname, which is still percent-encoded.
+        resolved = self.site.resolve(unquote(page))
+        source = None
+        if resolved is not None and resolved[0] == "page":
+            source = Path(resolved[1])
+        events = live.subscribe(source)
+        try:
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(b"retry: 1000\n\n")
+            while True:
+                try:
+                    event = events.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    self.wfile.write(b": ping\n\n")
+                    continue
+                if event is not None:
+                    self.wfile.write(f"data: {event}\n\n".encode())
+                # The tab reloads (or the server stops), so this stream is done.
+                break
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            live.unsubscribe(events)
+
+    def not_modified(self, etag: str) -> bool:
+        if etag not in self.headers.get("If-None-Match", "").split(", "):
+            return False
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header("ETag", etag)
+        self.end_headers()
+        return True
+
+    def send_headers(self, content_type: str, length: int, etag: str) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", etag)
+        # Always revalidate: the ETag makes that a cheap 304.
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        logger.info(f"{self.address_string()} {format % args}")
+
+
+def make_server(
+    site: DevSite,
+    host: str = "localhost",
+    port: int = 8888,
+    live: LiveReload | None = None,
+) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer(
+        (host, port), partial(DevRequestHandler, site=site, live=live)
+    )
+
+
+def serve(site: DevSite, host: str = "localhost", port: int = 8888) -> None:
+    live = LiveReload(site) if site.live_reload else None
+    if live is not None:
+        threading.Thread(target=live.run, daemon=True).start()
+    with make_server(site, host, port, live) as server:
+        logger.info(f"Serving on http://{host}:{server.server_port}{site.basepath}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if live is not None:
+                live.close()
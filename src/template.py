@@ -0,0 +1,107 @@
+from __future__ import annotations
+from pathlib import Path
+import re
+from typing import Dict, Iterable, List, TextIO
+
+from htmlnode import HTMLNode
+
+PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+ABSOLUTE_URL_RE = re.compile(r'\b(href|src)="/(?!/)')
+
+
+class Template:
+    """
+    A page template compiled into literal segments and named placeholder slots.
+
+    The source is parsed once; rendering a page is then a single join of the
+    literal segments with the values for each `{{ Name }}` slot, instead of one
+    full copy of the page per substitution.
+    """
+
+    def __init__(self, source: str, path: Path | None = None) -> None:
+        self.path: Path | None = path
+        self.segments: List[str] = []
+        self.slots: List[str] = []
+        pos = 0
+        for match in PLACEHOLDER_RE.finditer(source):
+            self.segments.append(source[pos : match.start()])
+            self.slots.append(match.group(1))
+            pos = match.end()
+        self.segments.append(source[pos:])
+
+    @classmethod
+    def from_path(cls, path: Path) -> Template:
+        return cls(path.read_text(), path)
+
+    def with_basepath(self, basepath: str) -> Template:
+        """
+        Return a copy whose literal href="/..." and src="/..." URLs start with basepath.
+
+        Only the template's own markup is rewritten; page content gets its
+        basepath when the Markdown is turned into nodes.
+        """
+        rebased = Template("", self.path)
+        rebased.slots = list(self.slots)
+        rebased.segments = [
+            ABSOLUTE_URL_RE.sub(lambda m: f'{m.group(1)}="{basepath}', segment)
+            for segment in self.segments
+        ]
+        return rebased
+
+    def with_markup(self, html: str, before: str = "</body>") -> Template:
+        """
+        Return a copy with html added to the template's own markup.
+
+        It goes right before the last occurrence of before, or at the very end
+        if the literal markup does not contain it.
+        """
+        injected = Template("", self.path)
+        injected.slots = list(self.slots)
+        injected.segments = list(self.segments)
+        for i in reversed(range(len(injected.segments))):
+            segment = injected.segments[i]
+            at = segment.rfind(before)
+            if at != -1:
+                injected.segments[i] = segment[:at] + html + segment[at:]
+                return injected
+        injected.segments[-1] += html
+        return injected
+
+    @property
+    def placeholders(self) -> set[str]:
+        return set(self.slots)
+
+    def validate(self, names: Iterable[str]) -> None:
+        """Raise ValueError if the template uses a placeholder outside names."""
+        unknown = self.placeholders - set(names)
+        if unknown:
+            listed = ", ".join(f"{{{{ {name} }}}}" for name in sorted(unknown))
+            raise ValueError(f"Unknown placeholder in {self.path or 'template'}: {listed}")
+
+    def render(self, values: Dict[str, str]) -> str:
+        self.validate(values)
+        parts: List[str] = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+    def write(self, out: TextIO, values: Dict[str, str | HTMLNode]) -> None:
+        """
+        Stream the rendered template to out.
+
+        HTMLNode values are written straight into out with write_html, so the
+        page content is never materialised as one large string.
+        """
+        self.validate(values)
+        out.write(self.segments[0])
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            value = values[slot]
+            if isinstance(value, HTMLNode):
+                value.write_html(out)
+            else:
+                out.write(value)
+            out.write(segment)
+
+    def __repr__(self) -> str:
+        return f"Template({self.path}, {self.slots})"
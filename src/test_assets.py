@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from assets import COPY_BATCH_BYTES, COPY_BATCH_FILES, batch_files, sync_tree
+
+
+class TestSyncTree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.static = self.root / "static"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "index.css").write_text("body {}")
+        (self.static / "images" / "logo.png").write_bytes(b"\x89PNG" * 100)
+        self.public = self.root / "docs"
+        self.public.mkdir()
+        (self.public / "index.html").write_text("<p>generated</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_first_sync_copies_everything_with_mtimes(self):
+        stats = sync_tree(self.static, self.public)
+        self.assertEqual((stats.copied, stats.skipped, stats.removed), (2, 0, 0))
+        self.assertEqual(stats.files, ["images/logo.png", "index.css"])
+        copy = self.public / "images" / "logo.png"
+        self.assertEqual(copy.read_bytes(), b"\x89PNG" * 100)
+        self.assertEqual(
+            copy.stat().st_mtime_ns, (self.static / "images" / "logo.png").stat().st_mtime_ns
+        )
+
+    def test_second_sync_skips_unchanged_files(self):
+        sync_tree(self.static, self.public)
+        stats = sync_tree(self.static, self.public)
+        self.assertEqual((stats.copied, stats.skipped), (0, 2))
+
+    def test_changed_file_is_copied(self):
+        sync_tree(self.static, self.public)
+        (self.static / "index.css").write_text("body { margin: 0 }")
+        stats = sync_tree(self.static, self.public)
+        self.assertEqual((stats.copied, stats.skipped), (1, 1))
+        self.assertEqual((self.public / "index.css").read_text(), "body { margin: 0 }")
+
+    def test_removed_asset_is_deleted_but_pages_are_kept(self):
+        first = sync_tree(self.static, self.public)
+        (self.static / "images" / "logo.png").unlink()
+        stats = sync_tree(self.static, self.public, first.files)
+        self.assertEqual(stats.removed, 1)
+        self.assertFalse((self.public / "images").exists())
+        self.assertTrue((self.public / "index.html").exists())
+
+    def test_verify_hash_skips_touched_file(self):
+        sync_tree(self.static, self.public)
+        os.utime(self.static / "index.css", ns=(0, 0))
+        self.assertEqual(sync_tree(self.static, self.public).copied, 1)
+        os.utime(self.static / "index.css", ns=(10**9, 10**9))
+        stats = sync_tree(self.static, self.public, verify_hash=True)
+        self.assertEqual((stats.copied, stats.skipped), (0, 2))
+        self.assertEqual((self.public / "index.css").stat().st_mtime_ns, 10**9)
+
+    def test_link_shares_the_source_inode(self):
+        sync_tree(self.static, self.public, link=True)
+        self.assertEqual(
+            (self.public / "index.css").stat().st_ino, (self.static / "index.css").stat().st_ino
+        )
+        # Replacing the source must not write through the link into the output.
+        (self.static / "index.css").unlink()
+        (self.static / "index.css").write_text("new")
+        sync_tree(self.static, self.public, link=True)
+        self.assertEqual((self.public / "index.css").read_text(), "new")
+
+    def test_missing_source_directory_syncs_nothing(self):
+        stats = sync_tree(self.root / "missing", self.public)
+        self.assertEqual(stats.files, [])
+
+    def test_parallel_sync_matches_serial(self):
+        for i in range(COPY_BATCH_FILES * 3):
+            (self.static / "images" / f"{i}.txt").write_text(str(i))
+        serial = sync_tree(self.static, self.root / "serial", workers=1)
+        parallel = sync_tree(self.static, self.root / "parallel", workers=4)
+        self.assertEqual(parallel.copied, serial.copied)
+        self.assertEqual(parallel.files, serial.files)
+        for rel in serial.files:
+            self.assertEqual(
+                (self.root / "parallel" / rel).read_bytes(),
+                (self.root / "serial" / rel).read_bytes(),
+            )
+
+
+class TestBatchFiles(unittest.TestCase):
+    def stat(self, size):
+        return os.stat_result((0o644, 0, 0, 1, 0, 0, size, 0, 0, 0))
+
+    def test_small_files_are_batched_by_count(self):
+        files = {f"{i}.css": self.stat(10) for i in range(COPY_BATCH_FILES + 1)}
+        self.assertEqual(
+            sorted(len(b) for b in batch_files(files)), [1, COPY_BATCH_FILES]
+        )
+
+    def test_large_files_get_their_own_batch_first(self):
+        files = {
+            "a.css": self.stat(10),
+            "big.mp4": self.stat(COPY_BATCH_BYTES * 2),
+            "b.css": self.stat(10),
+            "half1.png": self.stat(COPY_BATCH_BYTES // 2 + 1),
+            "half2.png": self.stat(COPY_BATCH_BYTES // 2 + 1),
+        }
+        batches = [[rel for rel, _ in batch] for batch in batch_files(files)]
+        self.assertEqual(batches[0], ["big.mp4"])
+        self.assertEqual(sorted(sum(batches, [])), sorted(files))
+        self.assertNotIn(["half1.png", "half2.png"], batches)
+
+
+if __name__ == "__main__":
+    unittest.main()
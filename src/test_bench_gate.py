@@ -0,0 +1,68 @@
+import unittest
+
+from bench_gate import add_ratios, check_corpus, compare, format_table
+
+
+def results(calibration, noise=0.1, **stages):
+    return {
+        "version": 2,
+        "corpus": {"small": {"pages": 2, "blocks": 4, "bytes": 100}},
+        "calibration": calibration,
+        "stages": {
+            stage: {"ratio": seconds / calibration, "noise": noise}
+            for stage, seconds in stages.items()
+        },
+    }
+
+
+class TestCompare(unittest.TestCase):
+    def test_slower_stage_beyond_tolerance_regresses(self):
+        baseline = results(1.0, to_html=0.100, build=0.500)
+        current = results(1.0, to_html=0.140, build=0.510)
+        rows = compare(baseline, current, tolerance=0.25, floor=0.002)
+        self.assertEqual(
+            [(stage, status) for stage, _, _, _, status in rows],
+            [("to_html", "REGRESSED"), ("build", "ok")],
+        )
+        self.assertIn("REGRESSED", format_table(rows))
+
+    def test_baseline_is_scaled_by_machine_speed(self):
+        baseline = results(1.0, to_html=0.100)
+        current = results(2.0, to_html=0.220)
+        [(_, expected, _, _, status)] = compare(baseline, current, 0.25, 0.002)
+        self.assertAlmostEqual(expected, 0.200)
+        self.assertEqual(status, "ok")
+
+    def test_tiny_slowdowns_are_noise(self):
+        baseline = results(1.0, markdown_to_blocks=0.001)
+        current = results(1.0, markdown_to_blocks=0.002)
+        self.assertEqual(compare(baseline, current, 0.25, 0.002)[0][4], "ok")
+
+    def test_stage_noisier_than_the_tolerance_is_not_failed(self):
+        baseline = results(1.0, build=0.500)
+        current = results(1.0, noise=0.4, build=0.700)
+        self.assertEqual(compare(baseline, current, 0.25, 0.002)[0][4], "noisy")
+
+    def test_ratios_follow_the_calibration_round_by_round(self):
+        # The machine gets twice as slow halfway through, and one round is
+        # hit by a neighbour; the median ratio sees neither.
+        stage = {
+            "runs": [0.1, 0.1, 0.2, 0.2, 0.5],
+            "reference": [1.0, 1.0, 2.0, 2.0, 2.0],
+        }
+        current = {"stages": {"to_html": stage}}
+        add_ratios(current)
+        self.assertAlmostEqual(stage["ratio"], 0.1)
+        self.assertAlmostEqual(current["calibration"], 2.0)
+        self.assertGreater(stage["noise"], 0)
+
+    def test_different_corpus_is_rejected(self):
+        baseline = results(1.0)
+        current = results(1.0)
+        current["corpus"]["small"]["pages"] = 3
+        with self.assertRaises(ValueError):
+            check_corpus(baseline, current)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,16 @@
 import unittest
-from block import markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node
+from block import (
+    markdown_to_blocks,
+    block_to_block_type,
+    BlockType,
+    classify_block,
+    scan_blocks,
+    SourceBlock,
+    get_block_html_node,
+    markdown_to_html_node,
+    use_inline_memo,
+    INLINE_MEMO_MAX_TEXT,
+)
 
 
 class TestBlockFunctions(unittest.TestCase):
@@ -90,6 +101,41 @@ This is the same paragraph on a new line
         blocks = markdown_to_blocks(md)
         self.assertEqual(blocks, [])
 
+    def test_whitespace_only_line_separates_blocks(self):
+        self.assertEqual(markdown_to_blocks("one\n   \ntwo"), ["one", "two"])
+
+    def test_fenced_code_with_blank_lines_stays_one_block(self):
+        md = "intro\n```\nfirst\n\n  \nlast\n```\nafter"
+        self.assertEqual(
+            markdown_to_blocks(md), ["intro", "```\nfirst\n\n  \nlast\n```", "after"]
+        )
+
+    def test_unclosed_fence_runs_to_end(self):
+        self.assertEqual(markdown_to_blocks("```\ncode\n\nmore"), ["```\ncode\n\nmore"])
+
+    def test_scan_blocks_line_numbers(self):
+        md = "\n# Title\r\n\r\ntext\rmore\r\r  \n```\na\n\nb\n```\n\n- item"
+        self.assertEqual(
+            list(scan_blocks(md)),
+            [
+                SourceBlock("# Title", 2),
+                SourceBlock("text\nmore", 4),
+                SourceBlock("```\na\n\nb\n```", 8),
+                SourceBlock("- item", 14),
+            ],
+        )
+
+    def test_scan_blocks_accepts_lines(self):
+        md = "# Title\n\n```\na\n\nb\n```\n\ntext\nmore\n"
+        self.assertEqual(
+            list(scan_blocks(md.splitlines(keepends=True))), list(scan_blocks(md))
+        )
+
+    def test_error_names_block_line(self):
+        with self.assertRaises(ValueError) as ctx:
+            markdown_to_html_node("# Title\n\nsome **unclosed")
+        self.assertIn("line 3", str(ctx.exception))
+
     # New tests for block_to_block_type
 
     def test_block_to_block_type_heading(self):
@@ -260,6 +306,93 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_basepath_applies_to_links_and_images(self):
+        md = "A [post](/blog/tom) and ![tom](/images/tom.png)"
+        html = markdown_to_html_node(md, "/loom/").to_html()
+        self.assertEqual(
+            html,
+            '<div><p>A <a href="/loom/blog/tom">post</a> and '
+            '<img src="/loom/images/tom.png" alt="tom"></img></p></div>',
+        )
+
+    def test_codeblock_with_blank_line(self):
+        md = "```\nfirst\n\nsecond\n```"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(html, "<div><pre><code>first\n\nsecond\n</code></pre></div>")
+
+    def test_basepath_does_not_touch_code_blocks(self):
+        md = """
+```
+<a href="/blog">blog</a>
+```
+"""
+        html = markdown_to_html_node(md, "/loom/").to_html()
+        self.assertEqual(
+            html, '<div><pre><code><a href="/blog">blog</a>\n</code></pre></div>'
+        )
+
+    def test_classify_block_carries_list_matches(self):
+        block = classify_block("1. one\n2.  two")
+        self.assertEqual(block.block_type, BlockType.ORDERED_LIST)
+        self.assertEqual([m.group(2) for m in block.matches], ["one", "two"])
+        self.assertEqual(block.lines, ["1. one", "2.  two"])
+
+    def test_classify_block_table_keeps_non_blank_lines(self):
+        block = classify_block("| a | b |\n| --- | ---: |\n\n| 1 | 2 |")
+        self.assertEqual(block.block_type, BlockType.TABLE)
+        self.assertEqual(len(block.lines), 3)
+
+    def test_table_alignment(self):
+        html = get_block_html_node("| a | b |\n| :---: | ---: |\n| 1 |").to_html()
+        self.assertEqual(
+            html,
+            '<table><thead><tr><th align="center">a</th><th align="right">b</th></tr>'
+            '</thead><tbody><tr><td align="center">1</td><td align="right"></td></tr>'
+            "</tbody></table>",
+        )
+
+    def test_single_character_ordered_item(self):
+        self.assertEqual(
+            get_block_html_node("1. a").to_html(), "<ol><ol>a</ol></ol>"
+        )
+
+
+class TestInlineMemo(unittest.TestCase):
+    TABLE = (
+        "| name | status | version |\n| --- | :---: | ---: |\n"
+        + "\n".join(f"| item {i} | **yes** | `1.2.3` |" for i in range(20))
+        + "\n| last |  | N/A |"
+    )
+
+    def tearDown(self):
+        use_inline_memo(0)
+
+    def test_memoized_output_matches_plain_parsing(self):
+        expected = markdown_to_html_node(self.TABLE).to_html()
+        memo = use_inline_memo(100)
+        self.assertEqual(markdown_to_html_node(self.TABLE).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(self.TABLE).to_html(), expected)
+        hits, misses = memo.stats()
+        # 3 headers, 21 names, "**yes**", "`1.2.3`", the empty cell and "N/A".
+        self.assertEqual(misses, 28)
+        self.assertEqual(hits, 2 * 66 - misses)
+
+    def test_repeated_runs_share_their_nodes(self):
+        use_inline_memo(100)
+        rows = markdown_to_html_node(self.TABLE).children[0].children[1].children
+        self.assertIs(rows[0].children[1].children[0], rows[1].children[1].children[0])
+
+    def test_long_text_is_not_memoized(self):
+        memo = use_inline_memo(100)
+        markdown_to_html_node("x" * (INLINE_MEMO_MAX_TEXT + 1))
+        self.assertEqual(memo.stats(), (0, 0))
+
+    def test_use_inline_memo_keeps_a_memo_of_the_same_size(self):
+        memo = use_inline_memo(100)
+        self.assertIs(use_inline_memo(100), memo)
+        self.assertIsNot(use_inline_memo(50), memo)
+        self.assertIsNone(use_inline_memo(0))
+
 
 if __name__ == "__main__":
     unittest.main()
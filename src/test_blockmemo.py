@@ -0,0 +1,85 @@
+import pickle
+import unittest
+
+from block import markdown_to_html_node
+from blockmemo import BlockMemo
+
+FOOTER = "> Found a mistake? [Edit this page](/edit)."
+
+
+class TestBlockMemo(unittest.TestCase):
+    def test_get_counts_hits_and_misses(self):
+        memo = BlockMemo()
+        self.assertIsNone(memo.get(("/", "text")))
+        memo.put(("/", "text"), "<p>text</p>")
+        self.assertEqual(memo.get(("/", "text")), "<p>text</p>")
+        self.assertEqual((memo.hits, memo.misses), (1, 1))
+        self.assertIn("1/2 blocks from memo (50%)", memo.stats())
+
+    def test_least_recently_used_blocks_are_dropped_beyond_the_bound(self):
+        memo = BlockMemo()
+        size = memo.entry_size(("/", "a"), "<p>a</p>")
+        memo.max_bytes = size * 2
+        memo.put(("/", "a"), "<p>a</p>")
+        memo.put(("/", "b"), "<p>b</p>")
+        memo.get(("/", "a"))
+        memo.put(("/", "c"), "<p>c</p>")
+        self.assertEqual(list(memo.entries), [("/", "a"), ("/", "c")])
+        self.assertEqual(memo.size, size * 2)
+
+    def test_oversized_block_is_not_kept(self):
+        memo = BlockMemo(max_bytes=10)
+        memo.put(("/", "a"), "<p>a</p>")
+        self.assertEqual((len(memo.entries), memo.size), (0, 0))
+
+    def test_pickled_memo_keeps_its_bound_but_not_its_entries(self):
+        memo = BlockMemo(max_bytes=1000)
+        memo.put(("/", "a"), "<p>a</p>")
+        copy = pickle.loads(pickle.dumps(memo))
+        self.assertEqual((copy.max_bytes, len(copy.entries)), (1000, 0))
+
+
+class TestMemoizedParsing(unittest.TestCase):
+    def document(self, edited: int | None = None) -> str:
+        blocks = [f"Paragraph {i} with **bold** and a [link](/p/{i})." for i in range(50)]
+        if edited is not None:
+            blocks[edited] = "An _edited_ paragraph."
+        return "# Title\n\n" + "\n\n".join(blocks + [FOOTER])
+
+    def test_memoized_output_matches_plain_parsing(self):
+        memo = BlockMemo()
+        for _ in range(2):
+            self.assertEqual(
+                markdown_to_html_node(self.document(), "/loom/", memo).to_html(),
+                markdown_to_html_node(self.document(), "/loom/").to_html(),
+            )
+
+    def test_editing_one_block_parses_only_that_block(self):
+        memo = BlockMemo()
+        markdown_to_html_node(self.document(), "/", memo)
+        misses = memo.misses
+        html = markdown_to_html_node(self.document(edited=20), "/", memo).to_html()
+        self.assertEqual(memo.misses - misses, 1)
+        self.assertEqual(html, markdown_to_html_node(self.document(edited=20)).to_html())
+
+    def test_boilerplate_blocks_are_shared_across_pages(self):
+        memo = BlockMemo()
+        markdown_to_html_node(f"# One\n\n{FOOTER}", "/", memo)
+        markdown_to_html_node(f"# Two\n\n{FOOTER}", "/", memo)
+        self.assertEqual((memo.hits, memo.misses), (1, 3))
+
+    def test_basepath_is_part_of_the_key(self):
+        memo = BlockMemo()
+        markdown_to_html_node(FOOTER, "/", memo)
+        self.assertIn('href="/loom/edit"', markdown_to_html_node(FOOTER, "/loom/", memo).to_html())
+
+    def test_failing_block_is_not_memoized(self):
+        memo = BlockMemo()
+        for _ in range(2):
+            with self.assertRaisesRegex(ValueError, "line 3"):
+                markdown_to_html_node("# Title\n\nBroken **bold", "/", memo)
+        self.assertEqual(len(memo.entries), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
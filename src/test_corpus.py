@@ -0,0 +1,47 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from block import BlockType, block_to_block_type, markdown_to_blocks, markdown_to_html_node
+from corpus import PROFILES, generate_corpus, write_corpus
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        self.corpus = generate_corpus(scale=0.05)
+
+    def test_same_seed_gives_same_documents(self):
+        self.assertEqual(self.corpus, generate_corpus(scale=0.05))
+        self.assertNotEqual(self.corpus, generate_corpus(scale=0.05, seed=1))
+
+    def test_every_profile_converts(self):
+        self.assertEqual(list(self.corpus), list(PROFILES))
+        for name, documents in self.corpus.items():
+            for document in documents:
+                with self.subTest(profile=name):
+                    markdown_to_html_node(document).to_html()
+
+    def test_profiles_exercise_their_block_types(self):
+        def types(name):
+            return {
+                block_to_block_type(block)
+                for document in self.corpus[name]
+                for block in markdown_to_blocks(document)
+            }
+
+        self.assertIn(BlockType.TABLE, types("tables"))
+        self.assertIn(BlockType.CODE, types("code"))
+        self.assertTrue({BlockType.QUOTE, BlockType.ORDERED_LIST} <= types("huge"))
+
+    def test_write_corpus_lays_out_a_site(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            write_corpus(root, self.corpus)
+            self.assertTrue((root / "template.html").is_file())
+            self.assertTrue((root / "content" / "index.md").is_file())
+            pages = list((root / "content").rglob("*.md"))
+            self.assertEqual(len(pages), 1 + sum(map(len, self.corpus.values())))
+
+
+if __name__ == "__main__":
+    unittest.main()
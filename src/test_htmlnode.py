@@ -1,6 +1,8 @@
 import unittest
 
 from htmlnode import HTMLNode
+from leafnode import LeafNode
+from parentnode import ParentNode
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -27,6 +29,16 @@ class TestHTMLNode(unittest.TestCase):
         self.assertEqual(
             "HTMLNode(p, value, None, {'href': 'https://www.boot.dev'})", repr(node)
         )
+    def test_base_node_cannot_render(self):
+        with self.assertRaises(NotImplementedError):
+            HTMLNode("p", "value").to_html()
+    def test_nodes_have_no_instance_dict(self):
+        for node in (
+            HTMLNode("p"),
+            LeafNode("b", "bold"),
+            ParentNode("p", [LeafNode(None, "text")]),
+        ):
+            self.assertFalse(hasattr(node, "__dict__"))
 
 if __name__ == "__main__":
     unittest.main()
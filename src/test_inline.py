@@ -343,6 +343,18 @@ class TestSplitNodesImage(unittest.TestCase):
             new_nodes,
         )
 
+    def test_repeated_image(self):
+        node = TextNode("![a](x.png) and ![a](x.png)", TextType.PLAIN)
+        new_nodes = split_nodes_image([node])
+        self.assertListEqual(
+            [
+                TextNode("a", TextType.IMAGE, "x.png"),
+                TextNode(" and ", TextType.PLAIN),
+                TextNode("a", TextType.IMAGE, "x.png"),
+            ],
+            new_nodes,
+        )
+
     def test_non_text_node_unchanged(self):
         node = TextNode("![alt text](url)", TextType.BOLD)
         new_nodes = split_nodes_image([node])
@@ -400,6 +412,29 @@ class TestSplitNodesLink(unittest.TestCase):
             new_nodes,
         )
 
+    def test_repeated_link(self):
+        node = TextNode(
+            "[same](https://a.com) then [same](https://a.com) and [other](https://b.com)",
+            TextType.PLAIN,
+        )
+        new_nodes = split_nodes_link([node])
+        self.assertListEqual(
+            [
+                TextNode("same", TextType.LINK, "https://a.com"),
+                TextNode(" then ", TextType.PLAIN),
+                TextNode("same", TextType.LINK, "https://a.com"),
+                TextNode(" and ", TextType.PLAIN),
+                TextNode("other", TextType.LINK, "https://b.com"),
+            ],
+            new_nodes,
+        )
+
+    def test_many_links(self):
+        text = " ".join(f"[l{i}](/p/{i})" for i in range(300))
+        new_nodes = split_nodes_link([TextNode(text, TextType.PLAIN)])
+        self.assertEqual(len(new_nodes), 599)
+        self.assertEqual(new_nodes[-1], TextNode("l299", TextType.LINK, "/p/299"))
+
     def test_non_text_node_unchanged_link(self):
         node = TextNode("[link](https://example.com)", TextType.ITALIC)
         new_nodes = split_nodes_link([node])
@@ -501,6 +536,146 @@ class TestTextToTextNodes(unittest.TestCase):
             nodes,
         )
 
+    def test_snake_case_is_plain_text(self):
+        text = "Call snake_case_function with some_arg"
+        self.assertListEqual([TextNode(text, TextType.PLAIN)], text_to_textnodes(text))
+
+    def test_unmatched_underscore_is_plain_text(self):
+        text = "An _unmatched underscore"
+        self.assertListEqual([TextNode(text, TextType.PLAIN)], text_to_textnodes(text))
+
+    def test_many_unmatched_underscores_are_plain_text(self):
+        # Each unmatched opener used to nest another scan, so a long list of
+        # _private names overflowed the stack.
+        text = "fields " + " ".join(["_a"] * 5000)
+        self.assertListEqual([TextNode(text, TextType.PLAIN)], text_to_textnodes(text))
+
+    def test_unmatched_underscores_before_a_match(self):
+        nodes = text_to_textnodes("_a " * 30 + "_b_")
+        self.assertListEqual(
+            [
+                TextNode("_a " * 30, TextType.PLAIN),
+                TextNode("b", TextType.ITALIC),
+            ],
+            nodes,
+        )
+
+    def test_italic_next_to_snake_case(self):
+        nodes = text_to_textnodes("my_var is _important_")
+        self.assertListEqual(
+            [
+                TextNode("my_var is ", TextType.PLAIN),
+                TextNode("important", TextType.ITALIC),
+            ],
+            nodes,
+        )
+
+    def test_underscores_in_link_url(self):
+        nodes = text_to_textnodes("[docs](https://example.com/a_b_c) here")
+        self.assertListEqual(
+            [
+                TextNode("docs", TextType.LINK, "https://example.com/a_b_c"),
+                TextNode(" here", TextType.PLAIN),
+            ],
+            nodes,
+        )
+
+    def test_code_span_hides_delimiters(self):
+        nodes = text_to_textnodes("Use `**kwargs` and `_private`")
+        self.assertListEqual(
+            [
+                TextNode("Use ", TextType.PLAIN),
+                TextNode("**kwargs", TextType.CODE),
+                TextNode(" and ", TextType.PLAIN),
+                TextNode("_private", TextType.CODE),
+            ],
+            nodes,
+        )
+
+    def test_unclosed_code_raises(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This has `unclosed code")
+
+    def test_bold_inside_link(self):
+        nodes = text_to_textnodes("See [the **best** post](/blog/tom)")
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.PLAIN),
+                TextNode(
+                    "the best post",
+                    TextType.LINK,
+                    "/blog/tom",
+                    [
+                        TextNode("the ", TextType.PLAIN),
+                        TextNode("best", TextType.BOLD),
+                        TextNode(" post", TextType.PLAIN),
+                    ],
+                ),
+            ],
+            nodes,
+        )
+
+    def test_link_inside_bold(self):
+        nodes = text_to_textnodes("**[home](/)**")
+        self.assertListEqual(
+            [
+                TextNode(
+                    "home",
+                    TextType.BOLD,
+                    None,
+                    [TextNode("home", TextType.LINK, "/")],
+                )
+            ],
+            nodes,
+        )
+
+    def test_italic_inside_bold(self):
+        nodes = text_to_textnodes("**very _much_ so**")
+        self.assertListEqual(
+            [
+                TextNode(
+                    "very much so",
+                    TextType.BOLD,
+                    None,
+                    [
+                        TextNode("very ", TextType.PLAIN),
+                        TextNode("much", TextType.ITALIC),
+                        TextNode(" so", TextType.PLAIN),
+                    ],
+                )
+            ],
+            nodes,
+        )
+
+    def test_bold_inside_italic(self):
+        nodes = text_to_textnodes("_a **b** c_")
+        self.assertListEqual(
+            [
+                TextNode(
+                    "a b c",
+                    TextType.ITALIC,
+                    None,
+                    [
+                        TextNode("a ", TextType.PLAIN),
+                        TextNode("b", TextType.BOLD),
+                        TextNode(" c", TextType.PLAIN),
+                    ],
+                )
+            ],
+            nodes,
+        )
+
+    def test_outer_delimiter_closes_before_inner(self):
+        nodes = text_to_textnodes("**a _b** c")
+        self.assertListEqual(
+            [TextNode("a _b", TextType.BOLD), TextNode(" c", TextType.PLAIN)],
+            nodes,
+        )
+
+    def test_image_without_word_alt_is_plain(self):
+        text = "![a-b](x.png)"
+        self.assertListEqual([TextNode(text, TextType.PLAIN)], text_to_textnodes(text))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,177 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import block
+from assets import sync_tree
+from instrument import (
+    STAGES,
+    BuildProfile,
+    Tracer,
+    format_report,
+    page_record,
+    profile_page,
+)
+from main import build_pages, collect_pages, write_page
+from parsecache import ParseCache
+from template import Template
+
+PAGE = """# Title
+
+Some **bold** text and a [link](/x).
+
+| a | b |
+| --- | ---: |
+| `1` | _2_ |
+
+```
+code
+```
+"""
+
+
+class TestProfilePage(unittest.TestCase):
+    def test_hooks_are_removed_afterwards(self):
+        originals = (block.classify_block, block.scan_blocks, Template.write)
+        with profile_page():
+            self.assertIsNot(block.classify_block, originals[0])
+        self.assertEqual((block.classify_block, block.scan_blocks, Template.write), originals)
+
+    def test_stages_are_timed_and_nodes_counted(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        plain = io.StringIO()
+        write_page(plain, PAGE, template, "/")
+        profiled = io.StringIO()
+        with profile_page() as timer:
+            write_page(profiled, PAGE, template, "/")
+        self.assertEqual(profiled.getvalue(), plain.getvalue())
+
+        record = page_record(Path("page.md"), timer)
+        self.assertEqual(set(record["stages"]), set(STAGES))
+        for stage in ("blocks", "classify", "inline", "table", "tree", "render", "template"):
+            self.assertGreater(record["stages"][stage], 0, stage)
+        self.assertAlmostEqual(record["seconds"], sum(record["stages"].values()))
+        self.assertEqual(record["blocks"], 4)
+        # h1 + text, p + 5 inline nodes, table/thead/tbody/2 tr/4 cells + 4, pre + code
+        self.assertEqual(record["nodes"], 2 + 6 + 13 + 2)
+
+    def test_nodes_served_from_the_parse_cache_are_counted(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ParseCache(Path(tmp))
+            counts = []
+            for _ in range(2):
+                with profile_page() as timer:
+                    cache.parse(PAGE)
+                counts.append((timer.blocks, timer.nodes))
+        self.assertEqual(counts, [(4, 2 + 6 + 13 + 2)] * 2)
+
+
+class TestBuildProfile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        for i in range(4):
+            (self.root / "content").mkdir(exist_ok=True)
+            (self.root / "content" / f"page{i}.md").write_text(PAGE * (i + 1))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_every_page_is_recorded_serially_and_in_workers(self):
+        template = Template("{{ Title }}{{ Content }}")
+        pages = collect_pages(self.root / "content", self.root)
+        for jobs in (1, 2):
+            reports = build_pages(pages, template, "/", jobs, profile=True)
+            self.assertEqual(
+                [report["profile"]["source"] for report in reports],
+                [src.as_posix() for src, _ in pages],
+            )
+        self.assertEqual(build_pages(pages, template, "/"), [{}] * len(pages))
+
+    def test_report_lists_the_slowest_pages(self):
+        profile = BuildProfile(top=2)
+        for i, seconds in enumerate((0.1, 0.3, 0.2)):
+            stages = dict.fromkeys(STAGES, 0.0)
+            stages["inline"] = seconds
+            profile.pages.append(
+                {
+                    "source": f"p{i}.md",
+                    "seconds": seconds,
+                    "stages": stages,
+                    "blocks": 1,
+                    "nodes": 2,
+                }
+            )
+        with profile.phase("pages"):
+            pass
+        report = profile.write(self.root / ".loom" / "profile.json")
+        self.assertEqual([page["source"] for page in report["slowest"]], ["p1.md", "p2.md"])
+        self.assertAlmostEqual(report["stages"]["inline"], 0.6)
+        self.assertEqual((report["pages_built"], report["nodes"]), (3, 6))
+        self.assertIn("p1.md", format_report(report))
+        self.assertTrue((self.root / ".loom" / "profile.json").exists())
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "content").mkdir()
+        for i in range(3):
+            (self.root / "content" / f"page{i}.md").write_text(PAGE)
+        self.pages = collect_pages(self.root / "content", self.root / "out")
+        (self.root / "out").mkdir()
+        self.template = Template("{{ Title }}{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def spans(self, events):
+        return [event for event in events if event["ph"] == "X"]
+
+    def test_page_steps_nest_inside_the_page_span(self):
+        (report,) = build_pages(self.pages[:1], self.template, "/", trace=True)
+        spans = self.spans(report["trace"])
+        self.assertEqual(
+            [span["name"] for span in spans], ["read", "parse", "render", "write", "page"]
+        )
+        page = spans[-1]
+        for span in spans[:-1]:
+            self.assertGreaterEqual(span["ts"], page["ts"])
+            self.assertLessEqual(span["ts"] + span["dur"], page["ts"] + page["dur"])
+            self.assertEqual((span["pid"], span["tid"]), (page["pid"], page["tid"]))
+        self.assertEqual(page["args"], {"page": self.pages[0][0].as_posix()})
+
+    def test_streamed_page_parses_while_rendering(self):
+        (report,) = build_pages(self.pages[:1], self.template, "/", 1, 0, trace=True)
+        names = [span["name"] for span in self.spans(report["trace"])]
+        self.assertEqual(names, ["read", "parse+render", "write", "page"])
+
+    def test_workers_trace_in_their_own_processes(self):
+        reports = build_pages(self.pages, self.template, "/", jobs=2, trace=True)
+        pids = {span["pid"] for report in reports for span in self.spans(report["trace"])}
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_asset_copies_and_trace_file(self):
+        (self.root / "static").mkdir()
+        (self.root / "static" / "a.css").write_text("a")
+        tracer = Tracer()
+        with tracer.span("build"):
+            sync_tree(self.root / "static", self.root / "out", tracer=tracer)
+        tracer.events.extend(build_pages(self.pages, self.template, "/", trace=True)[0]["trace"])
+        tracer.write(self.root / "trace.json")
+
+        events = json.loads((self.root / "trace.json").read_text())["traceEvents"]
+        copy = next(event for event in events if event["name"] == "copy")
+        self.assertEqual((copy["cat"], copy["args"]), ("asset", {"file": "a.css"}))
+        processes = [event for event in events if event["name"] == "process_name"]
+        self.assertEqual(processes[0]["args"], {"name": "build"})
+        threads = [(e["pid"], e["tid"]) for e in events if e["name"] == "thread_name"]
+        self.assertEqual(len(threads), len(set(threads)))
+
+
+if __name__ == "__main__":
+    unittest.main()
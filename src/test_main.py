@@ -0,0 +1,197 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from main import (
+    STREAM_THRESHOLD,
+    PageBuildError,
+    build_pages,
+    build_site,
+    collect_pages,
+    extract_title,
+)
+from block import use_inline_memo
+from blockmemo import BlockMemo
+from manifest import BuildManifest
+from parsecache import ParseCache
+from template import Template
+
+
+class TestBuildPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        for i in range(6):
+            (self.content / "blog" / f"post{i}.md").write_text(
+                f"# Post {i}\n\nSome **bold** text and a [link](/blog/post{i}.html)"
+            )
+        (self.content / "index.md").write_text("# Home\n\n![logo](/logo.png)")
+        self.template = self.root / "template.html"
+        self.template.write_text(
+            '<title>{{ Title }}</title><link href="/index.css">{{ Content }}'
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(
+        self,
+        out: str,
+        jobs: int,
+        stream_threshold: int = STREAM_THRESHOLD,
+        parse_cache: ParseCache | None = None,
+        block_memo: BlockMemo | None = None,
+    ):
+        pages = collect_pages(self.content, self.root / out)
+        for _, dest in pages:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+        build_pages(
+            pages,
+            Template.from_path(self.template),
+            "/loom/",
+            jobs,
+            stream_threshold,
+            parse_cache=parse_cache,
+            block_memo=block_memo,
+        )
+        return {
+            path.relative_to(self.root / out).as_posix(): path.read_bytes()
+            for path in (self.root / out).rglob("*.html")
+        }
+
+    def test_collect_pages_maps_sources_to_outputs(self):
+        pages = collect_pages(self.content, Path("docs"))
+        self.assertIn((self.content / "index.md", Path("docs/index.html")), pages)
+        self.assertIn(
+            (self.content / "blog" / "post3.md", Path("docs/blog/post3.html")), pages
+        )
+        self.assertEqual(len(pages), 7)
+
+    def test_parallel_output_matches_serial(self):
+        serial = self.build("serial", 1)
+        parallel = self.build("parallel", 3)
+        self.assertEqual(len(serial), 7)
+        self.assertEqual(serial, parallel)
+
+    def test_cached_parses_match_fresh_ones(self):
+        cache = ParseCache(self.root / "cache")
+        self.assertEqual(self.build("fresh", 1), self.build("cold", 3, parse_cache=cache))
+        self.assertEqual(len(list(cache.root.rglob("*/*"))), 7)
+        # A template-only change rebuilds every page from the cached trees.
+        self.template.write_text("<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build("fresh2", 1), self.build("warm", 3, parse_cache=cache))
+
+    def test_memoized_blocks_match_fresh_ones(self):
+        memo = BlockMemo()
+        self.assertEqual(self.build("fresh", 1), self.build("memo", 1, block_memo=memo))
+        # The second build finds every block in the memo.
+        misses = memo.misses
+        self.assertEqual(self.build("fresh", 1), self.build("memo2", 1, block_memo=memo))
+        self.assertEqual(memo.misses, misses)
+        self.assertGreater(memo.hits, 0)
+
+    def test_inline_memo_reports_hits_per_page(self):
+        self.addCleanup(use_inline_memo, 0)
+        plain = self.build("plain", 1)
+        pages = collect_pages(self.content, self.root / "out")
+        for _, dest in pages:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+        template = Template.from_path(self.template)
+        first = build_pages(pages, template, "/loom/", 3, inline_memo=100)
+        self.assertEqual(len(first), 7)
+        self.assertTrue(all(sum(report["inline_memo"]) for report in first))
+        build_pages(pages, template, "/loom/", 1, inline_memo=100)
+        # This process has seen every run now.
+        again = build_pages(pages, template, "/loom/", 1, inline_memo=100)
+        self.assertTrue(all(report["inline_memo"][1] == 0 for report in again))
+        self.assertEqual(self.build("out", 1), plain)
+
+    def test_streamed_output_matches_whole_file(self):
+        (self.content / "long.md").write_text(
+            "Intro\r\n\r\n# Long\n\n" + "Para with **bold**\n\n```\ncode\n\nmore\n```\n\n" * 50
+        )
+        self.assertEqual(self.build("whole", 1), self.build("streamed", 1, 0))
+
+    def test_streamed_error_names_failing_file(self):
+        (self.content / "blog" / "post4.md").write_text("no title here")
+        with self.assertRaises(PageBuildError) as ctx:
+            self.build("out", 1, 0)
+        self.assertIn("post4.md", str(ctx.exception))
+        self.assertFalse((self.root / "out" / "blog" / "post4.html.tmp").exists())
+
+    def test_extract_title_from_lines(self):
+        lines = ["Intro\n", "\n", "#  The Title \n", "# Other\n"]
+        self.assertEqual(extract_title(lines), "The Title")
+        self.assertEqual(extract_title("".join(lines)), "The Title")
+
+    def test_build_site_syncs_assets_alongside_pages(self):
+        static = self.root / "static"
+        (static / "images").mkdir(parents=True)
+        (static / "images" / "logo.png").write_bytes(b"png")
+        manifest = self.root / ".loom" / "manifest.json"
+        public = self.root / "site"
+        public.mkdir()
+        build_site(self.content, static, self.template, public, "/", manifest, jobs=2)
+        self.assertEqual((public / "images" / "logo.png").read_bytes(), b"png")
+        self.assertTrue((public / "blog" / "post5.html").exists())
+        self.assertEqual(BuildManifest.load(manifest).assets, ["images/logo.png"])
+
+    def test_build_site_reuses_unchanged_outputs_and_swaps_atomically(self):
+        manifest = self.root / ".loom" / "manifest.json"
+        public = self.root / "site"
+        static = self.root / "static"
+        build_site(self.content, static, self.template, public, "/", manifest)
+        post = public / "blog" / "post1.html"
+        inode = post.stat().st_ino
+        (self.content / "index.md").write_text("# New home")
+        build_site(self.content, static, self.template, public, "/", manifest)
+        self.assertEqual(post.stat().st_ino, inode)
+        self.assertIn("New home", (public / "index.html").read_text())
+        self.assertFalse((self.root / ".site.staging").exists())
+
+    def test_removed_assets_do_not_race_pages_into_their_directory(self):
+        manifest = self.root / ".loom" / "manifest.json"
+        public = self.root / "site"
+        static = self.root / "static"
+        shutil.rmtree(self.content / "blog")
+        (static / "blog").mkdir(parents=True)
+        for _ in range(5):
+            for i in range(20):
+                (static / "blog" / f"img{i}.png").write_bytes(b"png")
+            build_site(self.content, static, self.template, public, "/", manifest, jobs=2)
+            shutil.rmtree(static / "blog")
+            (self.content / "blog").mkdir()
+            for i in range(20):
+                (self.content / "blog" / f"post{i}.md").write_text(f"# Post {i}")
+            build_site(self.content, static, self.template, public, "/", manifest, jobs=2)
+            self.assertTrue((public / "blog" / "post19.html").exists())
+            self.assertEqual(list((public / "blog").glob("*.png")), [])
+            shutil.rmtree(self.content / "blog")
+            (static / "blog").mkdir()
+
+    def test_failed_build_leaves_output_untouched(self):
+        manifest = self.root / ".loom" / "manifest.json"
+        public = self.root / "site"
+        static = self.root / "static"
+        build_site(self.content, static, self.template, public, "/", manifest)
+        before = {p: p.read_bytes() for p in public.rglob("*.html")}
+        (self.content / "index.md").write_text("# Home again")
+        (self.content / "blog" / "post4.md").write_text("no title here")
+        with self.assertRaises(PageBuildError):
+            build_site(self.content, static, self.template, public, "/", manifest)
+        self.assertEqual({p: p.read_bytes() for p in public.rglob("*.html")}, before)
+        self.assertFalse((self.root / ".site.staging").exists())
+
+    def test_error_names_failing_file(self):
+        (self.content / "blog" / "post4.md").write_text("no title here")
+        for jobs in (1, 3):
+            with self.assertRaises(PageBuildError) as ctx:
+                self.build(f"out{jobs}", jobs)
+            self.assertIn("post4.md", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from manifest import BuildManifest, file_digest
+from main import generate_pages_incrementally
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_load_missing_manifest_is_empty(self):
+        manifest = BuildManifest.load(self.root / "missing.json")
+        self.assertEqual(manifest.pages, {})
+        self.assertFalse(manifest.same_settings("abc", "/"))
+
+    def test_load_corrupt_manifest_is_empty(self):
+        path = self.root / "manifest.json"
+        path.write_text("{not json")
+        self.assertEqual(BuildManifest.load(path).pages, {})
+
+    def test_save_and_load_round_trip(self):
+        source = self.root / "page.md"
+        source.write_text("# Title")
+        manifest = BuildManifest("t", "/loom/", assets=["index.css"])
+        st, digest = manifest.source_digest(source)
+        manifest.record(source, self.root / "page.html", st, digest)
+        path = self.root / "nested" / "manifest.json"
+        manifest.save(path)
+
+        loaded = BuildManifest.load(path)
+        self.assertTrue(loaded.same_settings("t", "/loom/"))
+        self.assertEqual(loaded.pages, manifest.pages)
+        self.assertEqual(loaded.assets, ["index.css"])
+
+    def test_source_digest_skips_hashing_when_stat_matches(self):
+        source = self.root / "page.md"
+        source.write_text("# Title")
+        st = source.stat()
+        manifest = BuildManifest(
+            pages={
+                source.as_posix(): {
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "hash": "recorded",
+                    "output": "page.html",
+                }
+            }
+        )
+        self.assertEqual(manifest.source_digest(source)[1], "recorded")
+
+    def test_source_digest_rehashes_when_stat_differs(self):
+        source = self.root / "page.md"
+        source.write_text("# Title")
+        manifest = BuildManifest(
+            pages={
+                source.as_posix(): {
+                    "mtime_ns": 0,
+                    "size": 0,
+                    "hash": "recorded",
+                    "output": "page.html",
+                }
+            }
+        )
+        self.assertEqual(manifest.source_digest(source)[1], file_digest(source))
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home\n\nWelcome")
+        (self.content / "blog" / "post.md").write_text("# Post\n\n[home](/)")
+        self.template = self.root / "template.html"
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}")
+        self.public = self.root / "docs"
+        self.manifest = self.root / ".loom" / "manifest.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, basepath="/"):
+        generate_pages_incrementally(
+            self.content, self.template, self.public, basepath, self.manifest
+        )
+
+    def mtimes(self):
+        return {
+            path.relative_to(self.public).as_posix(): path.stat().st_mtime_ns
+            for path in self.public.rglob("*.html")
+        }
+
+    def age_outputs(self):
+        for path in self.public.rglob("*.html"):
+            os.utime(path, ns=(0, 0))
+
+    def test_unchanged_build_skips_every_page(self):
+        self.build()
+        self.age_outputs()
+        self.build()
+        self.assertEqual(set(self.mtimes().values()), {0})
+
+    def test_only_changed_page_is_regenerated(self):
+        self.build()
+        self.age_outputs()
+        (self.content / "index.md").write_text("# Home\n\nWelcome back")
+        self.build()
+        mtimes = self.mtimes()
+        self.assertNotEqual(mtimes["index.html"], 0)
+        self.assertEqual(mtimes["blog/post.html"], 0)
+        self.assertIn("Welcome back", (self.public / "index.html").read_text())
+
+    def test_basepath_change_regenerates_every_page(self):
+        self.build()
+        self.age_outputs()
+        self.build("/loom/")
+        self.assertNotIn(0, self.mtimes().values())
+        self.assertIn('href="/loom/"', (self.public / "blog" / "post.html").read_text())
+
+    def test_template_change_regenerates_every_page(self):
+        self.build()
+        self.age_outputs()
+        self.template.write_text("<h1>{{ Title }}</h1>{{ Content }}")
+        self.build()
+        self.assertNotIn(0, self.mtimes().values())
+
+    def test_deleted_output_is_regenerated(self):
+        self.build()
+        (self.public / "index.html").unlink()
+        self.build()
+        self.assertTrue((self.public / "index.html").exists())
+
+    def test_removed_source_prunes_output(self):
+        self.build()
+        (self.content / "blog" / "post.md").unlink()
+        self.build()
+        self.assertFalse((self.public / "blog").exists())
+        self.assertTrue((self.public / "index.html").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
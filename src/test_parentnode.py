@@ -1,3 +1,5 @@
+import io
+import sys
 import unittest
 
 from parentnode import ParentNode
@@ -76,6 +78,42 @@ class TestParentNode(unittest.TestCase):
         node = ParentNode("div", None)
         with self.assertRaises(ValueError):
             node.to_html()
+    def test_write_html_streams_into_shared_buffer(self):
+        node = ParentNode(
+            "div",
+            [ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")])],
+            {"class": "post"},
+        )
+        out = io.StringIO()
+        out.write("<body>")
+        node.write_html(out)
+        out.write("</body>")
+        self.assertEqual(
+            out.getvalue(),
+            '<body><div class="post"><p><b>bold</b> text</p></div></body>',
+        )
+
+    def test_write_html_no_children(self):
+        node = ParentNode("div", [])
+        with self.assertRaises(ValueError):
+            node.write_html(io.StringIO())
+    def test_to_html_deeper_than_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 3
+        node = LeafNode("b", "core")
+        for _ in range(depth):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertEqual(html, "<span>" * depth + "<b>core</b>" + "</span>" * depth)
+
+    def test_to_html_children_order_with_mixed_nesting(self):
+        node = ParentNode(
+            "ol",
+            [
+                ParentNode("li", [LeafNode(None, "a"), ParentNode("i", [LeafNode(None, "b")])]),
+                LeafNode("li", "c"),
+            ],
+        )
+        self.assertEqual(node.to_html(), "<ol><li>a<i>b</i></li><li>c</li></ol>")
 
 if __name__ == "__main__":
     unittest.main()
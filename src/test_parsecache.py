@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from block import markdown_to_html_node
+from parsecache import ParseCache, decode_node, encode_node
+
+DOCUMENT = """# Title with `code`
+
+Some **bold**, _italic_ and a [link](/about) with ![an image](/logo.png).
+
+| a | b |
+| - | - |
+| 1 | **2** |
+
+> quoted _text_
+> more
+
+- one
+- two
+
+1. first
+2. second
+
+```
+code block
+```
+"""
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(Path(self.tmp.name) / "cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def entries(self):
+        return sorted(path for path in self.cache.root.rglob("*") if path.is_file())
+
+    def test_encoded_tree_renders_identically(self):
+        node = markdown_to_html_node(DOCUMENT, "/loom/")
+        self.assertEqual(decode_node(encode_node(node)).to_html(), node.to_html())
+
+    def test_second_parse_is_served_from_the_cache(self):
+        first = self.cache.parse(DOCUMENT, "/loom/")
+        path = self.cache.entry_path(DOCUMENT, "/loom/")
+        self.assertEqual(self.entries(), [path])
+        self.assertIsNotNone(self.cache.load(path))
+        second = self.cache.parse(DOCUMENT, "/loom/")
+        self.assertEqual(second.to_html(), first.to_html())
+        self.assertEqual(first.to_html(), markdown_to_html_node(DOCUMENT, "/loom/").to_html())
+
+    def test_basepath_is_part_of_the_key(self):
+        self.cache.parse(DOCUMENT, "/")
+        self.assertIn('href="/loom/about"', self.cache.parse(DOCUMENT, "/loom/").to_html())
+        self.assertEqual(len(self.entries()), 2)
+
+    def test_unreadable_entry_is_parsed_again(self):
+        path = self.cache.entry_path(DOCUMENT, "/")
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"\x00garbage")
+        with self.assertLogs("parsecache", "WARNING"):
+            node = self.cache.parse(DOCUMENT, "/")
+        self.assertEqual(node.to_html(), markdown_to_html_node(DOCUMENT, "/").to_html())
+        self.assertEqual(self.cache.load(path).to_html(), node.to_html())
+
+    def test_evict_drops_least_recently_used_entries(self):
+        documents = [f"# Page {i}\n\n{'text ' * 200}" for i in range(4)]
+        paths = []
+        for i, document in enumerate(documents):
+            self.cache.parse(document)
+            path = self.cache.entry_path(document, "/")
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+            paths.append(path)
+        # Reading the oldest entry makes it the most recently used.
+        self.cache.load(paths[0])
+        size = paths[0].stat().st_size
+        self.cache.max_bytes = size * 2
+        self.assertEqual(self.cache.evict(), 2)
+        self.assertEqual(self.entries(), sorted([paths[0], paths[3]]))
+        self.assertEqual(self.cache.evict(), 0)
+
+    def test_missing_cache_has_nothing_to_evict(self):
+        self.assertEqual(self.cache.evict(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import publish
+from publish import exchange_dirs, publish_output, stage_output, staging_path
+
+
+class TestPublish(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.public = self.root / "docs"
+        (self.public / "blog").mkdir(parents=True)
+        (self.public / "index.html").write_text("old index")
+        (self.public / "blog" / "post.html").write_text("old post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_staging_hardlinks_the_current_output(self):
+        staging = stage_output(self.public)
+        self.assertEqual(staging, staging_path(self.public))
+        self.assertEqual(
+            (staging / "blog" / "post.html").stat().st_ino,
+            (self.public / "blog" / "post.html").stat().st_ino,
+        )
+
+    def test_staging_without_reuse_starts_empty(self):
+        (staging_path(self.public) / "leftover").mkdir(parents=True)
+        staging = stage_output(self.public, reuse=False)
+        self.assertEqual(list(staging.iterdir()), [])
+
+    def test_publish_renames_staging_into_place(self):
+        staging = stage_output(self.public)
+        (staging / "index.html").unlink()
+        (staging / "index.html").write_text("new index")
+        publish_output(staging, self.public)
+        self.assertEqual((self.public / "index.html").read_text(), "new index")
+        self.assertEqual((self.public / "blog" / "post.html").read_text(), "old post")
+        self.assertEqual(sorted(p.name for p in self.root.iterdir()), ["docs"])
+
+    def test_exchange_dirs_swaps_both_paths(self):
+        other = self.root / "other"
+        other.mkdir()
+        (other / "index.html").write_text("other index")
+        if not exchange_dirs(other, self.public):
+            self.skipTest("renameat2(RENAME_EXCHANGE) is not available here")
+        self.assertEqual((self.public / "index.html").read_text(), "other index")
+        self.assertEqual((other / "index.html").read_text(), "old index")
+
+    def test_publish_falls_back_to_two_renames(self):
+        saved, publish.renameat2 = publish.renameat2, None
+        try:
+            self.test_publish_renames_staging_into_place()
+        finally:
+            publish.renameat2 = saved
+
+    def test_publish_into_missing_output(self):
+        self.public = self.root / "site"
+        staging = stage_output(self.public)
+        (staging / "index.html").write_text("first")
+        publish_output(staging, self.public)
+        self.assertEqual((self.public / "index.html").read_text(), "first")
+
+    def test_publish_flips_a_symlinked_output(self):
+        release = self.root / ".site.1"
+        os.rename(self.public, release)
+        link = self.root / "site"
+        link.symlink_to(release.name)
+        for text in ("second", "third"):
+            staging = stage_output(link)
+            (staging / "index.html").unlink()
+            (staging / "index.html").write_text(text)
+            publish_output(staging, link)
+            self.assertTrue(link.is_symlink())
+            self.assertEqual((link / "index.html").read_text(), text)
+            self.assertEqual((link / "blog" / "post.html").read_text(), "old post")
+        # Only the live release is left behind.
+        self.assertEqual(
+            sorted(p.name for p in self.root.iterdir()), sorted(["site", os.readlink(link)])
+        )
+
+    def test_symlink_target_not_created_here_is_kept(self):
+        link = self.root / "site"
+        link.symlink_to(self.public.name)
+        publish_output(stage_output(link), link)
+        self.assertTrue((self.public / "index.html").exists())
+        self.assertNotEqual(os.readlink(link), "docs")
+
+
+if __name__ == "__main__":
+    unittest.main()
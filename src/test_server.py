@@ -0,0 +1,218 @@
+import http.client
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from server import DevSite, LiveReload, make_server
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog" / "tom").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home\n\n[tom](/blog/tom)")
+        (self.content / "blog" / "tom" / "index.md").write_text("# Tom\n\nBombadil")
+        (self.content / "about.md").write_text("# About\n\nUs")
+        self.static = self.root / "static"
+        self.static.mkdir()
+        (self.static / "index.css").write_text("body {}")
+        self.template = self.root / "template.html"
+        self.template.write_text(
+            '<title>{{ Title }}</title><link href="/index.css">{{ Content }}'
+        )
+        self.site = DevSite(self.content, self.static, self.template, "/loom/")
+        self.server = make_server(self.site, port=0)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        )
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def get(self, path, headers=None):
+        conn = http.client.HTTPConnection("localhost", self.server.server_port)
+        conn.request("GET", path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    def test_nothing_rendered_until_requested(self):
+        self.assertEqual(self.site.pages, {})
+        self.get("/loom/blog/tom/")
+        self.assertEqual(list(self.site.pages), [self.content / "blog" / "tom" / "index.md"])
+
+    def test_page_is_rendered_with_basepath(self):
+        response, body = self.get("/loom/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        self.assertEqual(
+            body,
+            b'<title>Home</title><link href="/loom/index.css">'
+            b'<div><h1>Home</h1><p><a href="/loom/blog/tom">tom</a></p></div>',
+        )
+
+    def test_conditional_request_gets_304(self):
+        response, _ = self.get("/loom/about.html")
+        etag = response.getheader("ETag")
+        response, body = self.get("/loom/about.html", {"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+
+    def test_edited_source_is_rendered_again(self):
+        response, _ = self.get("/loom/about")
+        etag = response.getheader("ETag")
+        (self.content / "about.md").write_text("# About\n\nUs and them")
+        response, body = self.get("/loom/about", {"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"Us and them", body)
+        self.assertNotEqual(response.getheader("ETag"), etag)
+
+    def test_template_edit_invalidates_pages(self):
+        self.get("/loom/about")
+        self.template.write_text("<h1>{{ Title }}</h1>{{ Content }}")
+        _, body = self.get("/loom/about")
+        self.assertTrue(body.startswith(b"<h1>About</h1>"))
+
+    def test_static_file_and_304(self):
+        response, body = self.get("/loom/index.css")
+        self.assertEqual(body, b"body {}")
+        self.assertEqual(response.getheader("Content-Type"), "text/css")
+        response, _ = self.get(
+            "/loom/index.css", {"If-None-Match": response.getheader("ETag")}
+        )
+        self.assertEqual(response.status, 304)
+
+    def test_directory_without_slash_redirects(self):
+        response, _ = self.get("/loom/blog/tom")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.getheader("Location"), "/loom/blog/tom/")
+
+    def test_missing_and_outside_paths_are_404(self):
+        self.assertEqual(self.get("/loom/nope")[0].status, 404)
+        self.assertEqual(self.get("/loom/../template.html")[0].status, 404)
+        self.assertEqual(self.get("/elsewhere/")[0].status, 404)
+
+    def test_absolute_paths_are_404(self):
+        secret = self.root / "secret.txt"
+        secret.write_text("secret")
+        outside = secret.resolve().as_posix()
+        self.assertEqual(self.get(f"/loom/{outside}")[0].status, 404)
+        self.assertEqual(self.get(f"/loom/%2F{outside.lstrip('/')}")[0].status, 404)
+
+    def test_symlink_out_of_static_is_404(self):
+        (self.root / "secret.txt").write_text("secret")
+        (self.static / "leak.txt").symlink_to(self.root / "secret.txt")
+        self.assertEqual(self.get("/loom/leak.txt")[0].status, 404)
+
+    def test_render_error_is_500(self):
+        (self.content / "about.md").write_text("no title")
+        self.assertEqual(self.get("/loom/about")[0].status, 500)
+
+
+class TestLiveReload(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.content.mkdir()
+        (self.content / "index.md").write_text("# Home\n\nWelcome")
+        (self.content / "about.md").write_text("# About\n\nUs")
+        self.static = self.root / "static"
+        self.static.mkdir()
+        (self.static / "index.css").write_text("body {}")
+        self.template = self.root / "template.html"
+        self.template.write_text("<body>{{ Content }}</body>")
+        self.site = DevSite(self.content, self.static, self.template, live_reload=True)
+        self.live = LiveReload(self.site)
+
+    def tearDown(self):
+        self.live.close()
+        self.tmp.cleanup()
+
+    def test_only_tabs_on_the_changed_page_are_notified(self):
+        home = self.live.subscribe(self.content / "index.md")
+        about = self.live.subscribe(self.content / "about.md")
+        (self.content / "about.md").write_text("# About\n\nUs and them")
+        self.assertEqual(self.live.poll(), 1)
+        self.assertEqual(about.get_nowait(), "reload")
+        self.assertTrue(home.empty())
+
+    def test_static_change_notifies_every_tab(self):
+        self.live.subscribe(self.content / "index.md")
+        self.live.subscribe(None)
+        (self.static / "index.css").write_text("body { margin: 0 }")
+        self.assertEqual(self.live.poll(), 2)
+
+    def test_no_change_notifies_nobody(self):
+        self.live.subscribe(self.content / "index.md")
+        self.assertEqual(self.live.poll(), 0)
+
+    def test_failed_poll_is_logged_and_polling_continues(self):
+        calls = []
+
+        def poll():
+            calls.append(None)
+            if len(calls) == 1:
+                raise FileNotFoundError("vanished")
+            self.live.stopped.set()
+            return 0
+
+        self.live.poll = poll
+        with self.assertLogs("server", "ERROR"):
+            self.live.run(interval=0)
+        self.assertEqual(len(calls), 2)
+
+    def test_script_is_injected_and_stream_delivers_reload(self):
+        server = make_server(self.site, port=0, live=self.live)
+        thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+        thread.start()
+        try:
+            conn = http.client.HTTPConnection("localhost", server.server_port)
+            conn.request("GET", "/about")
+            body = conn.getresponse().read()
+            self.assertIn(b'new EventSource("/__livereload?path="', body)
+            self.assertTrue(body.endswith(b"</script></body>"))
+
+            conn = http.client.HTTPConnection("localhost", server.server_port, timeout=5)
+            conn.request("GET", "/__livereload?path=/about")
+            response = conn.getresponse()
+            self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+            self.assertEqual(response.readline(), b"retry: 1000\n")
+            self.assertEqual(response.readline(), b"\n")
+            (self.content / "about.md").write_text("# About\n\nChanged")
+            self.assertEqual(self.live.poll(), 1)
+            self.assertEqual(response.readline(), b"data: reload\n")
+            conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_page_with_encoded_path_is_reloaded(self):
+        (self.content / "my page.md").write_text("# Mine\n\nText")
+        server = make_server(self.site, port=0, live=self.live)
+        thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+        thread.start()
+        try:
+            conn = http.client.HTTPConnection("localhost", server.server_port, timeout=5)
+            # encodeURIComponent(location.pathname) for /my page
+            conn.request("GET", "/__livereload?path=%2Fmy%2520page")
+            response = conn.getresponse()
+            self.assertEqual(response.readline(), b"retry: 1000\n")
+            self.assertEqual(response.readline(), b"\n")
+            (self.content / "my page.md").write_text("# Mine\n\nChanged")
+            self.assertEqual(self.live.poll(), 1)
+            self.assertEqual(response.readline(), b"data: reload\n")
+            conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import io
+import unittest
+
+from leafnode import LeafNode
+from parentnode import ParentNode
+from template import Template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_substitutes_placeholders(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(
+            template.render({"Title": "Home", "Content": "<p>hi</p>"}),
+            "<title>Home</title><main><p>hi</p></main>",
+        )
+
+    def test_compiles_segments_and_slots(self):
+        template = Template("a{{ X }}b{{Y}}c")
+        self.assertEqual(template.segments, ["a", "b", "c"])
+        self.assertEqual(template.slots, ["X", "Y"])
+
+    def test_repeated_placeholder(self):
+        template = Template("{{ Title }} - {{ Title }}")
+        self.assertEqual(template.render({"Title": "T"}), "T - T")
+
+    def test_arbitrary_placeholder_names(self):
+        template = Template("<p>{{ Author }}</p>")
+        self.assertEqual(template.render({"Author": "Tolkien"}), "<p>Tolkien</p>")
+
+    def test_no_placeholders(self):
+        template = Template("<html></html>")
+        self.assertEqual(template.render({"Title": "unused"}), "<html></html>")
+
+    def test_values_are_not_rescanned(self):
+        template = Template("{{ Content }}{{ Title }}")
+        self.assertEqual(
+            template.render({"Content": "{{ Title }}", "Title": "x"}), "{{ Title }}x"
+        )
+
+    def test_unknown_placeholder_raises(self):
+        template = Template("{{ Title }}{{ Sidebar }}")
+        with self.assertRaises(ValueError) as ctx:
+            template.render({"Title": "Home"})
+        self.assertIn("{{ Sidebar }}", str(ctx.exception))
+
+    def test_validate(self):
+        template = Template("{{ Title }}{{ Content }}")
+        template.validate(["Title", "Content"])
+        with self.assertRaises(ValueError):
+            template.validate(["Title"])
+
+    def test_with_basepath_rewrites_template_urls(self):
+        template = Template(
+            '<link href="/index.css"><img src="/logo.png">'
+            '<script src="//cdn.example.com/x.js"></script>{{ Content }}'
+        ).with_basepath("/loom/")
+        self.assertEqual(
+            template.render({"Content": '<a href="/x">x</a>'}),
+            '<link href="/loom/index.css"><img src="/loom/logo.png">'
+            '<script src="//cdn.example.com/x.js"></script><a href="/x">x</a>',
+        )
+
+    def test_write_streams_nodes(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        node = ParentNode("p", [LeafNode("b", "hi")])
+        out = io.StringIO()
+        template.write(out, {"Title": "Home", "Content": node})
+        self.assertEqual(
+            out.getvalue(), "<title>Home</title><main><p><b>hi</b></p></main>"
+        )
+
+    def test_write_unknown_placeholder_raises(self):
+        with self.assertRaises(ValueError):
+            Template("{{ Sidebar }}").write(io.StringIO(), {"Title": "x"})
+
+    def test_with_markup_goes_before_closing_body(self):
+        template = Template("<body>{{ Content }}</body></html>").with_markup("<script></script>")
+        self.assertEqual(
+            template.render({"Content": "</body>"}),
+            "<body></body><script></script></body></html>",
+        )
+
+    def test_with_markup_appends_without_body(self):
+        template = Template("{{ Content }}").with_markup("<script></script>")
+        self.assertEqual(template.render({"Content": "x"}), "x<script></script>")
+        self.assertEqual(template.slots, ["Content"])
+
+
+if __name__ == "__main__":
+    unittest.main()
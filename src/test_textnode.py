@@ -36,6 +36,21 @@ class TestTextNode(unittest.TestCase):
             repr(node), "TextNode(This is a text node, BOLD, https://www.boot.dev)"
         )
 
+    def test_not_eq_children(self):
+        node = TextNode("ab", TextType.BOLD, None, [TextNode("ab", TextType.PLAIN)])
+        node2 = TextNode("ab", TextType.BOLD)
+        self.assertNotEqual(node, node2)
+
+    def test_repr_with_children(self):
+        node = TextNode("a", TextType.BOLD, None, [TextNode("a", TextType.ITALIC)])
+        self.assertEqual(
+            repr(node), "TextNode(a, BOLD, None, [TextNode(a, ITALIC, None)])"
+        )
+
+    def test_has_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+
 
 class TestTextNodeToHTML(unittest.TestCase):
     def test_plain(self):
@@ -96,6 +111,49 @@ class TestTextNodeToHTML(unittest.TestCase):
             {"src": "https://www.boot.dev/image.png", "alt": "alt text for image"},
         )
 
+    def test_link_with_basepath(self):
+        node = TextNode("home", TextType.LINK, "/blog/tom")
+        html_node = text_node_to_html_node(node, "/loom/")
+        self.assertEqual(html_node.props, {"href": "/loom/blog/tom"})
+
+    def test_image_with_basepath(self):
+        node = TextNode("logo", TextType.IMAGE, "/images/tom.png")
+        html_node = text_node_to_html_node(node, "/loom/")
+        self.assertEqual(
+            html_node.props, {"src": "/loom/images/tom.png", "alt": "logo"}
+        )
+
+    def test_basepath_leaves_external_urls_alone(self):
+        for url in ("https://www.boot.dev", "//cdn.example.com/x.js", "page.html"):
+            node = TextNode("link", TextType.LINK, url)
+            html_node = text_node_to_html_node(node, "/loom/")
+            self.assertEqual(html_node.props, {"href": url})
+
+    def test_nested_link_renders_children(self):
+        node = TextNode(
+            "the best post",
+            TextType.LINK,
+            "/blog/tom",
+            [
+                TextNode("the ", TextType.PLAIN),
+                TextNode("best", TextType.BOLD),
+                TextNode(" post", TextType.PLAIN),
+            ],
+        )
+        html_node = text_node_to_html_node(node, "/loom/")
+        self.assertEqual(
+            html_node.to_html(), '<a href="/loom/blog/tom">the <b>best</b> post</a>'
+        )
+
+    def test_nested_bold_renders_children(self):
+        node = TextNode(
+            "a b",
+            TextType.BOLD,
+            None,
+            [TextNode("a ", TextType.PLAIN), TextNode("b", TextType.ITALIC)],
+        )
+        self.assertEqual(text_node_to_html_node(node).to_html(), "<b>a <i>b</i></b>")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import watch
+from main import generate_pages_incrementally
+from watch import SiteWatcher, diff_snapshots, take_snapshot
+
+
+class TestSnapshots(unittest.TestCase):
+    def test_diff_snapshots(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+        self.assertEqual(diff_snapshots(old, new), ({"b", "d"}, {"c"}))
+
+    def test_take_snapshot_recurses_and_skips_missing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "dir" / "sub").mkdir(parents=True)
+            (root / "dir" / "sub" / "f.txt").write_text("abc")
+            (root / "top.txt").write_text("x")
+            snapshot = take_snapshot([root / "dir", root / "top.txt", root / "missing"])
+            self.assertEqual(
+                set(snapshot), {str(root / "dir" / "sub" / "f.txt"), str(root / "top.txt")}
+            )
+            self.assertEqual(snapshot[str(root / "top.txt")][1], 1)
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        (self.content / "blog").mkdir(parents=True)
+        (self.content / "index.md").write_text("# Home\n\nWelcome")
+        (self.content / "blog" / "post.md").write_text("# Post\n\n[home](/)")
+        self.static = self.root / "static"
+        self.static.mkdir()
+        (self.static / "index.css").write_text("body {}")
+        self.template = self.root / "template.html"
+        self.template.write_text("<title>{{ Title }}</title>{{ Content }}")
+        self.public = self.root / "docs"
+        self.manifest = self.root / ".loom" / "manifest.json"
+        generate_pages_incrementally(
+            self.content, self.template, self.public, "/", self.manifest
+        )
+        self.watcher = SiteWatcher(
+            self.content, self.static, self.template, self.public, "/", self.manifest
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_no_change_rebuilds_nothing(self):
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_changed_page_is_the_only_output(self):
+        (self.content / "index.md").write_text("# Home\n\nWelcome back")
+        self.assertEqual(self.watcher.poll(), [self.public / "index.html"])
+        self.assertIn("Welcome back", (self.public / "index.html").read_text())
+
+    def test_touched_page_with_same_content_is_skipped(self):
+        os.utime(self.content / "index.md", ns=(0, 0))
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_template_change_rebuilds_every_page(self):
+        self.template.write_text("<h1>{{ Title }}</h1>{{ Content }}")
+        outputs = self.watcher.poll()
+        self.assertEqual(
+            set(outputs), {self.public / "index.html", self.public / "blog" / "post.html"}
+        )
+        self.assertIn("<h1>Post</h1>", (self.public / "blog" / "post.html").read_text())
+
+    def test_new_and_removed_assets(self):
+        (self.static / "images").mkdir()
+        (self.static / "images" / "logo.png").write_bytes(b"png")
+        (self.static / "index.css").unlink()
+        outputs = self.watcher.poll()
+        self.assertEqual(
+            set(outputs), {self.public / "images" / "logo.png", self.public / "index.css"}
+        )
+        self.assertEqual((self.public / "images" / "logo.png").read_bytes(), b"png")
+        self.assertFalse((self.public / "index.css").exists())
+
+    def test_removed_page_prunes_output_and_manifest(self):
+        (self.content / "blog" / "post.md").unlink()
+        self.assertEqual(self.watcher.poll(), [self.public / "blog" / "post.html"])
+        self.assertFalse((self.public / "blog").exists())
+        self.assertNotIn(
+            (self.content / "blog" / "post.md").as_posix(), self.watcher.manifest.pages
+        )
+
+    def test_broken_page_is_logged_and_watching_continues(self):
+        (self.content / "index.md").write_text("no title")
+        with self.assertLogs("watch", "ERROR"):
+            self.assertEqual(self.watcher.poll(), [])
+        (self.content / "index.md").write_text("# Fixed\n\ntext")
+        self.assertEqual(self.watcher.poll(), [self.public / "index.html"])
+
+    def poll_with_vanished(self, *vanished):
+        # Files that were there when the snapshot was taken but are gone by
+        # the time the watcher gets to them.
+        take_snapshot = watch.take_snapshot
+
+        def snapshot(paths):
+            files = take_snapshot(paths)
+            for path in vanished:
+                files[str(path)] = (1, 1)
+            return files
+
+        watch.take_snapshot = snapshot
+        try:
+            return self.watcher.poll()
+        finally:
+            watch.take_snapshot = take_snapshot
+
+    def test_vanished_files_are_treated_as_removed(self):
+        (self.content / "index.md").write_text("# Home\n\nWelcome back")
+        gone = self.content / "blog" / "post.md"
+        gone.unlink()
+        outputs = self.poll_with_vanished(self.static / "gone.png", gone)
+        self.assertEqual(
+            set(outputs),
+            {
+                self.public / "index.html",
+                self.public / "gone.png",
+                self.public / "blog" / "post.html",
+            },
+        )
+        self.assertFalse((self.public / "blog" / "post.html").exists())
+        self.assertNotIn(gone.as_posix(), self.watcher.manifest.pages)
+        self.assertNotIn("gone.png", self.watcher.manifest.assets)
+
+    def test_broken_template_keeps_other_changes(self):
+        self.template.write_text("<title>{{ Title }}</title>{{ Body }}")
+        (self.content / "index.md").write_text("# Home\n\nWelcome back")
+        (self.static / "index.css").write_text("body { margin: 0 }")
+        with self.assertLogs("watch", "ERROR"):
+            outputs = self.watcher.poll()
+        self.assertEqual(set(outputs), {self.public / "index.html", self.public / "index.css"})
+        self.assertEqual((self.public / "index.css").read_text(), "body { margin: 0 }")
+        self.template.write_text("<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.watcher.poll()), 2)
+        self.assertIn("<h1>Home</h1>", (self.public / "index.html").read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
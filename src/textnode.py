@@ -1,7 +1,10 @@
+from __future__ import annotations
 from enum import Enum
+from typing import List
 
 from htmlnode import HTMLNode
 from leafnode import LeafNode
+from parentnode import ParentNode
 
 
 class TextType(Enum):
@@ -14,10 +17,24 @@ class TextType(Enum):
 
 
 class TextNode:
-    def __init__(self, txt: str, node_type: TextType, url: str | None = None) -> None:
+    # Pages create tens of thousands of text nodes; slots keep each one free
+    # of a per-instance __dict__.
+    __slots__ = ("text", "node_type", "url", "children")
+
+    def __init__(
+        self,
+        txt: str,
+        node_type: TextType,
+        url: str | None = None,
+        children: List[TextNode] | None = None,
+    ) -> None:
         self.text: str = txt
         self.node_type: TextType = node_type
         self.url: str | None = url
+        # Set when a BOLD, ITALIC or LINK node contains further inline
+        # markup, e.g. bold text inside a link. text then holds the plain
+        # text of the children.
+        self.children: List[TextNode] | None = children
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, TextNode):
@@ -27,13 +44,37 @@ class TextNode:
             self.text == other.text
             and self.node_type == other.node_type
             and self.url == other.url
+            and self.children == other.children
         )
 
     def __repr__(self) -> str:
-        return f"TextNode({self.text}, {self.node_type.value}, {self.url})"
+        fields = f"{self.text}, {self.node_type.value}, {self.url}"
+        if self.children is not None:
+            fields += f", {self.children}"
+        return f"TextNode({fields})"
+
+
+def apply_basepath(url: str, basepath: str) -> str:
+    """Prefix site-absolute URLs such as /images/x.png with the site's basepath."""
+    if basepath != "/" and url.startswith("/") and not url.startswith("//"):
+        return basepath + url[1:]
+    return url
+
 
+NESTED_TAGS = {TextType.BOLD: "b", TextType.ITALIC: "i", TextType.LINK: "a"}
 
-def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
+
+def text_node_to_html_node(text_node: TextNode, basepath: str = "/") -> HTMLNode:
+    if text_node.children:
+        tag = NESTED_TAGS.get(text_node.node_type)
+        if tag is None:
+            raise ValueError("Node type cannot have children", text_node.__repr__())
+        props = None
+        if text_node.node_type == TextType.LINK:
+            url = text_node.url if text_node.url is not None else ""
+            props = {"href": apply_basepath(url, basepath)}
+        children = [text_node_to_html_node(n, basepath) for n in text_node.children]
+        return ParentNode(tag, children, props)
     if text_node.node_type == TextType.PLAIN:
         return LeafNode(tag=None, value=text_node.text)
     elif text_node.node_type == TextType.BOLD:
@@ -46,14 +87,20 @@ def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
         return LeafNode(
             "a",
             text_node.text,
-            {"href": text_node.url if text_node.url is not None else ""},
+            {
+                "href": apply_basepath(text_node.url, basepath)
+                if text_node.url is not None
+                else ""
+            },
         )
     elif text_node.node_type == TextType.IMAGE:
         return LeafNode(
             "img",
             "",
             {
-                "src": text_node.url if text_node.url is not None else "",
+                "src": apply_basepath(text_node.url, basepath)
+                if text_node.url is not None
+                else "",
                 "alt": text_node.text,
             },
         )
@@ -0,0 +1,226 @@
+"""
+Watch mode: poll the site's sources and rebuild only what changed.
+
+The watcher stays in one process, so the compiled template and the build
+manifest are kept in memory between rebuilds instead of being reloaded.
+"""
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Dict, Iterable, List, Set, Tuple
+
+from assets import copy_file, remove_output
+from blockmemo import BlockMemo
+from main import (
+    PAGE_PLACEHOLDERS,
+    STREAM_THRESHOLD,
+    PageBuildError,
+    build_page,
+    collect_pages,
+)
+from manifest import BuildManifest, file_digest
+from parsecache import ParseCache
+from template import Template
+
+POLL_INTERVAL = 0.05
+
+logger = logging.getLogger(__name__)
+
+# Path of every watched file -> (mtime_ns, size)
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def scan_tree(root: str, snapshot: Snapshot) -> None:
+    # Files and directories deleted while they are scanned (by a checkout or
+    # an editor's temporary files) are left out, as if already gone.
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    scan_tree(entry.path, snapshot)
+                elif entry.is_file():
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        pass
+
+
+def take_snapshot(paths: Iterable[Path]) -> Snapshot:
+    """Stat every file below paths; missing paths are skipped."""
+    snapshot: Snapshot = {}
+    for path in paths:
+        if path.is_dir():
+            scan_tree(str(path), snapshot)
+        elif path.is_file():
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[str(path)] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Tuple[Set[str], Set[str]]:
+    """Return the files added or modified, and the files removed, between two snapshots."""
+    changed = {path for path, stat in new.items() if old.get(path) != stat}
+    removed = old.keys() - new.keys()
+    return changed, removed
+
+
+class SiteWatcher:
+    def __init__(
+        self,
+        content: Path,
+        static: Path,
+        template_path: Path,
+        public: Path,
+        basepath: str,
+        manifest_path: Path,
+        stream_threshold: int = STREAM_THRESHOLD,
+        parse_cache: ParseCache | None = None,
+        block_memo: BlockMemo | None = None,
+    ) -> None:
+        self.content = content
+        self.static = static
+        self.template_path = template_path
+        self.public = public
+        self.basepath = basepath
+        self.manifest_path = manifest_path
+        self.stream_threshold = stream_threshold
+        self.parse_cache = parse_cache
+        self.block_memo = block_memo
+        self.manifest = BuildManifest.load(manifest_path)
+        self.template = self.load_template()
+        self.snapshot = take_snapshot(self.watched())
+
+    def watched(self) -> List[Path]:
+        return [self.content, self.static, self.template_path]
+
+    def load_template(self) -> Template:
+        template = Template.from_path(self.template_path).with_basepath(self.basepath)
+        template.validate(PAGE_PLACEHOLDERS)
+        return template
+
+    def page_output(self, source: Path) -> Path:
+        return self.public / source.relative_to(self.content).with_suffix(".html")
+
+    def asset_output(self, source: Path) -> Path:
+        return self.public / source.relative_to(self.static)
+
+    def poll(self) -> List[Path]:
+        """
+        Rebuild whatever changed since the last poll and return the outputs touched.
+
+        A page that fails to build is logged and left out of the manifest, so
+        the next full build retries it; the watcher itself keeps running. So
+        does it when the template fails to load: the other changes are built
+        with the previous template. A file that disappeared since the
+        snapshot is treated as removed.
+        """
+        snapshot = take_snapshot(self.watched())
+        changed, removed = diff_snapshots(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        if not changed and not removed:
+            return []
+
+        start = time.perf_counter()
+        outputs: List[Path] = []
+        pages: List[Path] = []
+        rebuild_all = False
+        if str(self.template_path) in changed:
+            try:
+                template_hash = file_digest(self.template_path)
+                if template_hash != self.manifest.template_hash:
+                    self.template = self.load_template()
+                    self.manifest.template_hash = template_hash
+                    rebuild_all = True
+                    pages = [source for source, _ in collect_pages(self.content, self.public)]
+            except (ValueError, OSError) as e:
+                logger.error(f"Keeping the previous template: {e}")
+
+        assets = set(self.manifest.assets)
+        for name in sorted(changed):
+            path = Path(name)
+            if path.is_relative_to(self.content) and path.suffix == ".md":
+                if not rebuild_all:
+                    pages.append(path)
+            elif path.is_relative_to(self.static):
+                dest = self.asset_output(path)
+                try:
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    copy_file(path, dest, path.stat())
+                except FileNotFoundError:
+                    removed.add(name)
+                    continue
+                except OSError as e:
+                    logger.error(f"Failed to copy {path}: {e!r}")
+                    continue
+                assets.add(path.relative_to(self.static).as_posix())
+                outputs.append(dest)
+
+        for name in sorted(removed):
+            path = Path(name)
+            if path.is_relative_to(self.content) and path.suffix == ".md":
+                dest = self.page_output(path)
+                self.manifest.pages.pop(path.as_posix(), None)
+            elif path.is_relative_to(self.static):
+                dest = self.asset_output(path)
+                assets.discard(path.relative_to(self.static).as_posix())
+            else:
+                continue
+            remove_output(dest, self.public)
+            outputs.append(dest)
+
+        for source in pages:
+            dest = self.page_output(source)
+            try:
+                st, digest = self.manifest.source_digest(source)
+            except FileNotFoundError:
+                self.manifest.pages.pop(source.as_posix(), None)
+                remove_output(dest, self.public)
+                outputs.append(dest)
+                continue
+            except OSError as e:
+                logger.error(f"Failed to read {source}: {e!r}")
+                self.manifest.pages.pop(source.as_posix(), None)
+                continue
+            if not rebuild_all and self.manifest.is_fresh(source, dest, digest, self.public):
+                continue
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                build_page(
+                    (source, dest),
+                    self.template,
+                    self.basepath,
+                    self.stream_threshold,
+                    parse_cache=self.parse_cache,
+                    block_memo=self.block_memo,
+                )
+            except PageBuildError as e:
+                logger.error(e)
+                self.manifest.pages.pop(source.as_posix(), None)
+                continue
+            self.manifest.record(source, dest, st, digest, self.public)
+            outputs.append(dest)
+
+        self.manifest.assets = sorted(assets)
+        self.manifest.save(self.manifest_path)
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"Rebuilt {len(outputs)} outputs in {elapsed:.0f} ms")
+        return outputs
+
+    def run(self, interval: float = POLL_INTERVAL) -> None:
+        logger.info(f"Watching {', '.join(str(path) for path in self.watched())}")
+        try:
+            while True:
+                time.sleep(interval)
+                try:
+                    self.poll()
+                except OSError:
+                    logger.exception("Rebuild failed; still watching")
+        except KeyboardInterrupt:
+            pass
@@ -1 +1,5 @@
-python3 -m unittest discover -s src
\ No newline at end of file
+python3 -m unittest discover -s src || exit 1
+# ./test.sh --bench also fails on performance regressions against src/bench_baseline.json.
+if [ "$1" = "--bench" ]; then
+    python3 src/bench_gate.py || exit 1
+fi